@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+from sys import argv
+import random
+import time
+import numpy as np
+from src.moeaOps import getLevels
+from src.population import Population
+
+"""
+Times getLevels on populations of growing size to show how the
+    non-dominated sort scales with mu + lambda. Run it from the top of the
+    repository with:
+
+    python3 -m benchmarks.levelsBenchmark [largestPopulation]
+
+The moea tuples are drawn the same way SolutionBoard makes them, with the
+    lit fraction of a board with 500 white cells and small violation counts.
+"""
+DEFAULT_LARGEST = 20000
+REPEATS = 5
+
+# Returns a Population of size rows with random moea tuples and no genes.
+def randomPopulation(size):
+    moeas = []
+    for _ in range(size):
+        firstObj = random.randint(300, 500) / 500
+        secondObj = 1 / (random.randint(0, 40) * 0.5 + 1)
+        thirdObj = 1 / (random.randint(0, 20) * 0.5 + 1)
+        moeas.append((firstObj, secondObj, thirdObj))
+    population = Population(None, None, {"searchAlgorithm": "MOEA"}, np.zeros((size, 0), dtype='uint8'))
+    population.setEvaluations(moeas)
+    return population
+
+def main():
+    largest = DEFAULT_LARGEST
+    if len(argv) == 2:
+        largest = int(argv[1])
+    random.seed(0)
+
+    print("popSize\tlevels\tseconds\tmicrosecondsPerIndividual")
+    size = 100
+    while size <= largest:
+        population = randomPopulation(size)
+        best = None
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            levels = getLevels(population)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        print(f"{size}\t{len(levels)}\t{best:.5f}\t{best / size * 1e6:.2f}")
+        size *= 2
+
+if __name__ == '__main__':
+    main()
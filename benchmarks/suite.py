@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+import numpy as np
+from src.board import Board
+from src.solutionBoard import SolutionBoard
+from src.baseGenotypeSetup import BaseGenotype
+from src.population import getRandomPopulation, makeOffspring
+from src.genotypeOps import parentTourny, parentFitnessProp, parentUniform, \
+    survivalTourny, survivalTruncation, survivalUniform, survivalFitnessProp
+from src.moeaOps import getLevels
+from src.puzzleGenerator import generatePuzzle
+
+"""
+Times the evaluation and selection hot paths on problems/d1.lup,
+    problems/d2.lup and generated square boards of growing size. Run it from
+    the top of the repository with:
+
+    python3 -m benchmarks.suite [--sizes N ...] [--out results.json]
+                                [--compare baseline.json] [--tolerance 0.15]
+
+Every benchmark is reported as a rate, the number of operations done per
+    second, so higher is always better:
+
+    solutionBoard:      SolutionBoard evaluations per second
+    batchEvaluate:      genotype evaluations per second with the BatchEvaluator
+    crossover:          children per second from population.makeOffspring
+    parentTourny, parentFitnessProp, parentUniform:
+                        lambda children made per second, which includes crossover
+    survivalTourny, survivalTruncation, survivalUniform, survivalFitnessProp:
+                        mu survivors picked per second out of mu + lambda
+    getLevels:          mu + lambda MOEA individuals sorted per second
+
+The results are printed and, with --out, saved as JSON. With --compare, each
+    rate is checked against a saved JSON file and any that dropped by more
+    than the tolerance (15% by default) is flagged as a regression, which also
+    makes the exit code 1.
+"""
+DEFAULT_SIZES = [25, 50, 100]
+DEFAULT_TOLERANCE = 0.15
+PROBLEM_FILES = ["problems/d1.lup", "problems/d2.lup"]
+
+# Each timing is repeated until it takes at least MIN_TIME seconds, and the
+#   best rate of REPEATS timings is kept.
+MIN_TIME = 0.2
+REPEATS = 5
+
+BENCHMARK_CONFIG = {
+    "searchAlgorithm": "EA",
+    "mu": 100,
+    "lambda": 100,
+    "mutationRate": 1000,
+    "parentTournyK": 5,
+    "survivalTournyK": 5,
+    "parentFitnessProp": False,
+    "parentUniform": False,
+    "survivalTruncation": True,
+    "survivalUniform": False,
+    "survivalFitnessProp": False,
+    "commaSurvival": False,
+    "enforceBlackCellConstraint": True,
+    "validityForcedInit": False,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the evaluation and selection hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES,
+                        help="sides of the generated square boards")
+    parser.add_argument("--out", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of earlier results to check against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    boards = []
+    for path in PROBLEM_FILES:
+        boards.append((path, Board(open(path, 'r'))))
+    for size in args.sizes:
+        boardArray, _ = generatePuzzle(size, size, seed=size)
+        boards.append((f"generated{size}x{size}", Board.fromArray(boardArray)))
+
+    results = {}
+    print("benchmark\trate")
+    for name, board in boards:
+        for benchmark, rate in benchmarkBoard(board):
+            key = name + ":" + benchmark
+            results[key] = rate
+            print(f"{key}\t{rate:.1f}")
+
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.out is not None:
+        with open(args.out, 'w') as outFile:
+            json.dump(report, outFile, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as baselineFile:
+            baseline = json.load(baselineFile)["results"]
+        if compareResults(baseline, results, args.tolerance):
+            sys.exit(1)
+
+# Returns the rate of fn, which does count operations each call.
+def getRate(fn, count):
+    best = 0
+    for _ in range(REPEATS):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0
+        while elapsed < MIN_TIME:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, calls * count / elapsed)
+    return best
+
+# Returns a list of (benchmark, rate) for one board.
+def benchmarkBoard(board):
+    random.seed(0)
+    config = dict(BENCHMARK_CONFIG)
+    baseGenotype = BaseGenotype(board, config)
+    baseGenotype.startRun(0, config)
+    mu = config["mu"]
+    numOfOffspring = config["lambda"]
+
+    population = getRandomPopulation(baseGenotype, board, config, mu)
+    population.evaluate()
+    offspringRows = np.arange(numOfOffspring) % mu
+    offspring = makeOffspring(population, offspringRows, (offspringRows + 1) % mu)
+    offspring.evaluate()
+    combined = population.concat(offspring)
+
+    genes = np.unpackbits(population.genotypes, axis=1, count=baseGenotype.numOfGenes).astype('bool')
+    lightLists = [[tuple(cell) for cell in baseGenotype.cells[lights]] for lights in genes]
+
+    rates = []
+    rates.append(("solutionBoard", getRate(
+        lambda: [SolutionBoard(board, config, lights) for lights in lightLists], mu)))
+    rates.append(("batchEvaluate", getRate(lambda: baseGenotype.evaluator.evaluate(genes), mu)))
+    rows = np.arange(mu)
+    rates.append(("crossover", getRate(lambda: makeOffspring(population, rows, rows - 1), mu)))
+
+    for name, parentFunction in (("parentTourny", parentTourny),
+                                 ("parentFitnessProp", parentFitnessProp),
+                                 ("parentUniform", parentUniform)):
+        rates.append((name, getRate(
+            lambda: makeOffspring(population, *parentFunction(population, board, config)),
+            numOfOffspring)))
+
+    for name, survivalFunction in (("survivalTourny", survivalTourny),
+                                   ("survivalTruncation", survivalTruncation),
+                                   ("survivalUniform", survivalUniform),
+                                   ("survivalFitnessProp", survivalFitnessProp)):
+        rates.append((name, getRate(lambda: survivalFunction(combined, board, config), mu)))
+
+    moeaConfig = dict(config, searchAlgorithm="MOEA")
+    moeaBase = BaseGenotype(board, moeaConfig)
+    moeaBase.startRun(0, moeaConfig)
+    moeaPopulation = getRandomPopulation(moeaBase, board, moeaConfig, mu + numOfOffspring)
+    moeaPopulation.evaluate()
+    rates.append(("getLevels", getRate(lambda: getLevels(moeaPopulation), mu + numOfOffspring)))
+
+    return rates
+
+# Prints how each rate changed from baseline. Returns True if any dropped by
+#   more than tolerance.
+def compareResults(baseline, results, tolerance):
+    foundRegression = False
+    print("\nbenchmark\tbaseline\tcurrent\tchange")
+    for key in sorted(set(baseline) & set(results)):
+        change = results[key] / baseline[key] - 1
+        flag = ""
+        if change < -tolerance:
+            flag = "\tREGRESSION"
+            foundRegression = True
+        print(f"{key}\t{baseline[key]:.1f}\t{results[key]:.1f}\t{change:+.1%}{flag}")
+    for key in sorted(set(baseline) - set(results)):
+        print(f"{key}\tmissing from the current results")
+    return foundRegression
+
+if __name__ == '__main__':
+    main()
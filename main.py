@@ -1,22 +1,31 @@
 #!/usr/bin/python3
 from sys import argv
-from src.board import Board
-from src.randomSearch import runAllRandom
-from src.randomEA import runAllEA
-from src.randomMOEA import runAllMOEA
+from src.problemCache import loadBoard
+from src.experiment import runConfig
+from src.checkpoint import getResumeSeed, removeCheckpoints
+import glob
 import json
+import os
 import random
 from datetime import datetime
 
 DEFAULT_CONFIG = "configs/defaultConfig.json"
 
 def main():
-    if len(argv) == 3:
-        probPath = argv[1]
-        configPath = argv[2]
-    elif len(argv) == 2:
+    if len(argv) > 1 and argv[1] == "--batch":
+        batchMain(argv[2:])
+        return
+
+    # --resume can go anywhere after main.py.
+    args = [arg for arg in argv[1:] if arg != "--resume"]
+    resume = len(args) < len(argv) - 1
+
+    if len(args) == 2:
+        probPath = args[0]
+        configPath = args[1]
+    elif len(args) == 1:
         print('Using the default config file since none was specified!')
-        probPath = argv[1]
+        probPath = args[0]
         configPath = DEFAULT_CONFIG
     else:
         print('An inappropriate number of arguments were passed!')
@@ -24,38 +33,95 @@ def main():
 
     print(f'The problem file passed is: {probPath}')
     print(f'The config file passed is: {configPath}')
-    probFile = loadFile(probPath)
     configFile = loadFile(configPath)
 
-    board = Board(probFile)
     config = buildConfig(configFile)
+    board = loadBoard(probPath, config.get("problemCacheDir"))
+    setUpCheckpoints(config, resume)
     print(board)
 
     # The bulk of the computing goes here.
-    if config["searchAlgorithm"] == "Random Search":
-        logTxt, solTxt = runAllRandom(board, config, probPath)
-    elif config["searchAlgorithm"] == "EA":
-        logTxt, solTxt = runAllEA(board, config, probPath)
-    elif config["searchAlgorithm"] == "MOEA":
-        logTxt, solTxt = runAllMOEA(board, config, probPath)
+    runConfig(board, config, probPath)
+
+# Runs many configs at once. See the README for the arguments.
+def batchMain(args):
+    # Imported here since only batches need them.
+    import argparse
+    from src.batchRunner import runBatch
+
+    parser = argparse.ArgumentParser(prog="main.py --batch")
+    parser.add_argument("configs", nargs="+", help="config files, directories or globs")
+    parser.add_argument("--problem", help="problem file for configs without problemPath")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--logDir", help="write logs here, named after each config")
+    parser.add_argument("--solDir", help="write solutions here, named after each config")
+    parser.add_argument("--resume", action="store_true", help="carry on from the configs' checkpoints")
+    args = parser.parse_args(args)
+
+    configPaths = findConfigs(args.configs)
+    if len(configPaths) == 0:
+        print('No config files were found!')
+        return
+    rootDir = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in configPaths])
+
+    batchConfigs = []
+    for configPath in configPaths:
+        config = buildConfig(loadFile(configPath))
+        probPath = config.get("problemPath", args.problem)
+        if probPath is None:
+            print(f'No problem file was given for {configPath}!')
+            return
+
+        # Logs and solutions are named after the config file, so
+        #   configs/2a/d1ParentUniformConfig.json with --logDir logs
+        #   writes logs/2a/d1ParentUniformLog.txt.
+        name = os.path.splitext(os.path.basename(configPath))[0]
+        if name.endswith("Config"):
+            name = name[:-len("Config")]
+        subDir = os.path.relpath(os.path.dirname(os.path.abspath(configPath)), rootDir)
+        if args.logDir is not None:
+            config["logPath"] = os.path.normpath(os.path.join(args.logDir, subDir, name + "Log.txt"))
+        if args.solDir is not None:
+            config["solPath"] = os.path.normpath(os.path.join(args.solDir, subDir, name + "Solution.txt"))
+        for path in (config["logPath"], config["solPath"]):
+            if os.path.dirname(path) != "":
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        setUpCheckpoints(config, args.resume)
 
-    writeFile(config["logPath"], logTxt)
+        print(f'{configPath}: {probPath} -> {config["logPath"]}')
+        batchConfigs.append((config, probPath))
 
-    solTxt = board.wholeFile + "\n" + solTxt
-    writeFile(config["solPath"], solTxt)
+    runBatch(batchConfigs, args.workers)
 
+# Returns the sorted .json config files in the given files, globs and directories.
+def findConfigs(patterns):
+    configPaths = []
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            if os.path.isdir(path):
+                configPaths += glob.glob(os.path.join(path, "**", "*.json"), recursive=True)
+            elif path.endswith(".json"):
+                configPaths.append(path)
+    return sorted(set(configPaths))
 
-# The following two functions abstract out
-# the file loading and writing from the main method.
+# With resume, a config that has checkpoints takes the seed they were made
+#   with so its runs carry on from them. Without it, old checkpoints of the
+#   config are removed so the job starts over.
+def setUpCheckpoints(config, resume):
+    if not resume:
+        removeCheckpoints(config)
+        return
+    resumeSeed = getResumeSeed(config)
+    if resumeSeed is not None:
+        print(f'Resuming {config["logPath"]} from its checkpoints.')
+        config["usedSeed"] = resumeSeed
+
+# The following function abstracts out
+# the file loading from the main method.
 def loadFile(path):
     file = open(path, 'r')
     return file
 
-def writeFile(fileName, fileString):
-    file = open(fileName, 'w')
-    file.write(fileString)
-    file.close()
-
 # The following reads the json config file and puts it into a python dict.
 # It also sets the random seed.
 def buildConfig(configFile):
@@ -1,103 +1,121 @@
 from .solutionBoard import SolutionBoard
+from .batchEvaluator import BatchEvaluator
+from .evalCache import EvalCache
+from .constraintPropagator import ConstraintPropagator
+from .problemCache import loadForcedCells, saveForcedCells
+from .profiler import PhaseProfiler
+from .localSearch import LocalSearch
 import numpy as np
+import random
 
 # Returns a BaseGenotype class defined at the bottom of the file.
-def getBaseGenotype(board, config):
-    whiteCells = sorted(board.whiteCells)
-    baseGenotype = []
-
+#   forcedCells can be given when forceValidity was already run on the board.
+def getBaseGenotype(board, config, forcedCells=None):
     if config["validityForcedInit"]:
-        alwaysLightCells = forceValidity(board, config)
-        baseGenotype = BaseGenotype(board, config, alwaysLightCells)
+        if forcedCells is None:
+            forcedCells = forceValidity(board, config)
+        alwaysLightCells, neverLightCells = forcedCells
+        baseGenotype = BaseGenotype(board, config, alwaysLightCells, neverLightCells)
     else:
         baseGenotype = BaseGenotype(board, config)
 
-    print(f"Base Genotype: {baseGenotype.genotype}")
-    print(f"Always Light Cells: {baseGenotype.alwaysLightCells}")
+    # Only the counts are printed, since the cells themselves take a long
+    #   time to print on a large board.
+    print(f"Base Genotype: {baseGenotype.numOfGenes} genes")
+    print(f"Always Light Cells: {len(baseGenotype.alwaysLightCells)}")
     return baseGenotype
 
 """
 Only run if validityForcedInit is in the config file.
-It returns a list of form [(x,y), (x,y), ...] where (x,y) are coordinates
-    where a light should always be placed.
+It returns (alwaysLightCells, neverLightCells), two lists of form
+    [(x,y), (x,y), ...] of the white cells that hold a light in every solution
+    and of the ones that can not hold a light in any solution. They are found
+    by a ConstraintPropagator. If the board is in the problem cache they are
+    kept there, so they are only found once for each problem file.
 """
 def forceValidity(board, config):
-    blackCellsWithMult = sorted(board.blackCells)
-    runAgainFlag = True
-
-    neverLightCells = []
-    alwaysLightCells = []
-
-    # The while loop is continually run until there are no more changes defined below.
-    while runAgainFlag:
-        runAgainFlag = False
-        cellsToRemove = []
-        for x, y in blackCellsWithMult:
-            sol = SolutionBoard(board, config, alwaysLightCells)
-            boardCopy = np.copy(sol.board)
-
-            curCell = boardCopy[x][y]
-            if curCell == 5:
-                cellsToRemove.append((x,y))
-
-            neighbors = getNeighbors(board, boardCopy, x, y, neverLightCells)
-            if curCell == 0:
-                cellsToRemove.append((x,y))
-                neverLightCells += neighbors
-                # Run the loop again because of new neverLightCells.
-                runAgainFlag = True
-            elif len(neighbors) == curCell:
-                alwaysLightCells += neighbors
-                # Run the loop again because of new lit spots on board.
-                runAgainFlag = True
-                cellsToRemove.append((x,y))
-        for cell in cellsToRemove:
-            blackCellsWithMult.remove(cell)
-
-    return alwaysLightCells
-
-# Returns all neighbors of (x,y) where a light could possibly be placed.
-def getNeighbors(board, boardCopy, x, y, neverLightCells):
-    xLimit = board.x
-    yLimit = board.y
-    neighbors = []
-    if x > 0:
-        tempX = x - 1
-        if boardCopy[tempX][y] == -1 and (tempX, y) not in neverLightCells:
-            neighbors.append((tempX, y))
-    if x < (xLimit - 1):
-        tempX = x + 1
-        if boardCopy[tempX][y] == -1 and (tempX, y) not in neverLightCells:
-            neighbors.append((tempX, y))
-
-    if y > 0:
-        tempY = y - 1
-        if boardCopy[x][tempY] == -1 and (x, tempY) not in neverLightCells:
-            neighbors.append((x, tempY))
-    if y < (yLimit - 1):
-        tempY = y + 1
-        if boardCopy[x][tempY] == -1 and (x, tempY) not in neverLightCells:
-            neighbors.append((x, tempY))
-
-    return neighbors
+    forcedCells = loadForcedCells(board)
+    if forcedCells is None:
+        forcedCells = ConstraintPropagator(board).propagate()
+        saveForcedCells(board, forcedCells)
+    return forcedCells
 
 """
 Below is a class with a few helpful variables used in every future individual.
 
-genotype: A list of form [[False, (x,y)], [False, (x,y)], ...] where
-            the boolean is whether the light is placed in the (x,y) white space.
-            Each boolean is set to False because this is the base version.
+cells:      An array of form [[x, y], [x, y], ...] holding the white cell that
+                each gene stands for. Individuals only store one bit per gene,
+                packed eight to a byte, and look the coordinates up here.
+numOfGenes: The number of genes, which is len(cells).
+numOfBytes: The number of bytes a packed genotype takes up.
 alwaysLightCells: A list of form [(x,y), (x,y), ...] where
             (x,y) are coordinates of white cells where lights should always be
             placed. This is empty if validityForcedInit is not in the config file
+neverLightCells: A list of form [(x,y), (x,y), ...] of white cells that can
+            never hold a light. They are left out of cells, so they are never
+            searched. This is also empty without validityForcedInit.
+evaluator:  A BatchEvaluator over cells, shared by every individual.
+parallelEvaluator: A ParallelEvaluator used for the offspring instead of
+                evaluator if evalWorkers is in the config file, otherwise None.
+evalCache:  An EvalCache shared by every individual if evalCacheSize is in
+                the config file, otherwise None.
+rng:        The numpy random Generator used for the genotype operators. It is
+                seeded from the random module so the seed in the config covers it.
+profiler:   The PhaseProfiler of the current run if profile is true in the
+                config file, otherwise None.
+localSearch: The LocalSearch run on the offspring if localSearchFraction is
+                in the config file, otherwise None.
 """
 class BaseGenotype:
-    def __init__(self, board, config, alwaysLightCells=[]):
+    def __init__(self, board, config, alwaysLightCells=[], neverLightCells=[]):
         sol = SolutionBoard(board, config, alwaysLightCells)
-        whiteCellsList = np.argwhere(sol.board == -1)
-
-        self.genotype = []
-        for x, y in whiteCellsList:
-            self.genotype.append([False, (x, y)])
+        isGene = sol.board == -1
+        for x, y in neverLightCells:
+            isGene[x, y] = False
+        self.cells = np.argwhere(isGene)
+        self.numOfGenes = len(self.cells)
+        self.numOfBytes = (self.numOfGenes + 7) // 8
 
         self.alwaysLightCells = alwaysLightCells
+        self.neverLightCells = neverLightCells
+        self.evaluator = BatchEvaluator(board, config, self.cells, alwaysLightCells)
+        self.parallelEvaluator = None
+        if "evalWorkers" in config:
+            # Imported here so jobs without evalWorkers do not load multiprocessing.
+            from .parallelEvaluator import ParallelEvaluator
+            self.parallelEvaluator = ParallelEvaluator(board, config, self)
+        self.evalCache = None
+        if "evalCacheSize" in config:
+            self.evalCache = EvalCache(config["evalCacheSize"], alwaysLightCells)
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.profiler = None
+        self.localSearch = None
+        if "localSearchFraction" in config:
+            self.localSearch = LocalSearch(board, config, self)
+
+    # Seeds both random number generators for a new run and gives it an empty
+    #   evalCache, so the run does not depend on the runs before it. It also
+    #   gets a new PhaseProfiler if profile is true.
+    def startRun(self, runSeed, config):
+        random.seed(runSeed)
+        self.rng = np.random.default_rng(runSeed)
+        if self.evalCache is not None:
+            self.evalCache = EvalCache(config["evalCacheSize"], self.alwaysLightCells)
+        if config.get("profile", False):
+            self.profiler = PhaseProfiler()
+        if self.localSearch is not None:
+            self.localSearch.takeEvals()
+
+    # Returns the evaluations used since it was last asked on top of the
+    #   lambda offspring, which are the flips tried by the local search.
+    def takeExtraEvals(self):
+        if self.localSearch is None:
+            return 0
+        return self.localSearch.takeEvals()
+
+    # Releases anything held for the run, such as the pool and shared memory
+    #   of the parallelEvaluator. Runs call it in a finally block, so nothing
+    #   is left behind when a run fails or is stopped.
+    def endRun(self):
+        if self.parallelEvaluator is not None:
+            self.parallelEvaluator.close()
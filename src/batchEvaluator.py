@@ -0,0 +1,166 @@
+import numpy as np
+
+"""
+The class BatchEvaluator scores a whole population of light placements at once
+    instead of building one SolutionBoard per individual. It gives back exactly
+    the same lit counts, violations, scores and moea tuples as SolutionBoard.
+
+board:            The Board the placements are on.
+config:           The configuration dict.
+geneCells:        A list of tuples (x, y). Column i of every genes matrix
+                    passed in says whether a bulb is on geneCells[i].
+alwaysLightCells: A list of tuples (x, y) that always hold a bulb.
+
+The incidence of each gene on the x segments, y segments and numbered black
+    cells of the board is worked out once here. Evaluating a
+    (population x genes) boolean matrix is then a handful of bincounts.
+"""
+class BatchEvaluator:
+    def __init__(self, board, config, geneCells, alwaysLightCells=[]):
+        self.board = board
+        self.config = config
+        self.numOfGenes = len(geneCells)
+
+        geneCells = np.array(geneCells, dtype='int').reshape(-1, 2)
+        geneIndex = board.cellIndex[geneCells[:, 0], geneCells[:, 1]]
+        self.geneXSegment = board.cellXSegment[geneIndex]
+        self.geneYSegment = board.cellYSegment[geneIndex]
+
+        # Pairs of (gene, numbered black cell) that are orthogonal neighbors.
+        geneOfCell = np.full(board.whiteCount, -1, dtype='int')
+        geneOfCell[geneIndex] = np.arange(self.numOfGenes)
+        adjGene = geneOfCell[board.adjWhite]
+        self.adjGene = adjGene[adjGene != -1]
+        self.adjNumbered = board.adjNumbered[adjGene != -1]
+
+        # The bulbs that are always placed are counted once up front.
+        fixedCells = np.array(alwaysLightCells, dtype='int').reshape(-1, 2)
+        fixedIndex = board.cellIndex[fixedCells[:, 0], fixedCells[:, 1]]
+        self.fixedXBulbs = np.bincount(board.cellXSegment[fixedIndex],
+                                       minlength=board.numXSegments)
+        self.fixedYBulbs = np.bincount(board.cellYSegment[fixedIndex],
+                                       minlength=board.numYSegments)
+        isFixed = np.zeros(board.whiteCount, dtype='bool')
+        isFixed[fixedIndex] = True
+        self.fixedNeighbors = np.bincount(board.adjNumbered,
+                                          weights=isFixed[board.adjWhite],
+                                          minlength=len(board.numberedCells))
+
+    # Returns the lit count, light violations and black cell violations
+    #   of every row of genes as three integer arrays.
+    def evaluate(self, genes):
+        board = self.board
+        popSize = len(genes)
+        rows, cols = np.nonzero(genes)
+
+        xBulbs = self.countPerRow(rows, self.geneXSegment[cols], popSize,
+                                  board.numXSegments) + self.fixedXBulbs
+        yBulbs = self.countPerRow(rows, self.geneYSegment[cols], popSize,
+                                  board.numYSegments) + self.fixedYBulbs
+
+        # Same counting as SolutionBoard.setLitCount, one row per individual.
+        lightViolations = 2 * np.maximum(xBulbs - 1, 0).sum(axis=1)
+        lightViolations += 2 * np.maximum(yBulbs - 1, 0).sum(axis=1)
+        litCount = np.count_nonzero((xBulbs[:, board.cellXSegment] > 0) |
+                                    (yBulbs[:, board.cellYSegment] > 0), axis=1)
+
+        blackCellViolations = np.zeros(popSize, dtype='int')
+        if self.config["enforceBlackCellConstraint"]:
+            rows, pairs = np.nonzero(genes[:, self.adjGene])
+            neighboringLights = self.countPerRow(rows, self.adjNumbered[pairs], popSize,
+                                                 len(board.numberedCells))
+            neighboringLights = neighboringLights + self.fixedNeighbors
+            diff = np.abs(neighboringLights - board.numberedValues)
+            blackCellViolations = diff.sum(axis=1).astype('int')
+
+        return litCount, lightViolations, blackCellViolations
+
+    # Returns a list with the score (or the moea tuple for the MOEA) of every
+    #   row of genes, matching what SolutionBoard would give for each one.
+    def scores(self, genes):
+        return getValues(self, self.evaluate(genes))
+
+    # Counts the (row, label) pairs into a (popSize, numOfLabels) array.
+    @staticmethod
+    def countPerRow(rows, labels, popSize, numOfLabels):
+        counts = np.bincount(rows * numOfLabels + labels, minlength=popSize * numOfLabels)
+        return counts.reshape(popSize, numOfLabels)
+
+# Turns the counts of one light placement into its score, or into its moea
+#   tuple for the MOEA, in the same way SolutionBoard does.
+def getValue(config, whiteCount, litCount, lightViolations, blackCellViolations):
+    if "MOEA" == config["searchAlgorithm"]:
+        firstObj = litCount / whiteCount
+        secondObj = 1 / (lightViolations * 0.5 + 1) # Add one to avoid 1/0
+        thirdObj = 1 / (blackCellViolations * 0.5 + 1) # Add one to avoid 1/0
+        return (firstObj, secondObj, thirdObj)
+
+    # SolutionBoard.penalize works from the violation total taken
+    #   before the lights are counted, which is always zero.
+    #   The same total is used here so both give equal scores.
+    violations = 0
+    score = litCount
+    if "penaltyCoefficient" in config:
+        score -= violations * config["penaltyCoefficient"]
+    elif violations > 0:
+        score = 0
+    return score / whiteCount
+
+# Turns the counts given back by evaluate into a list of scores or moea tuples.
+def getValues(evaluator, counts):
+    values = []
+    for litCount, lightV, blackV in zip(*[count.tolist() for count in counts]):
+        values.append(getValue(evaluator.config, evaluator.board.whiteCount,
+                               litCount, lightV, blackV))
+    return values
+
+# Returns the score (or moea tuple) of every row of a (population x bytes)
+#   matrix of packed genotypes, found with one call to the evaluator of
+#   baseGenotype. If the BaseGenotype has an evalCache, only the genotypes it
+#   has not seen before are evaluated.
+def evaluateGenotypes(baseGenotype, packed):
+    if len(packed) == 0:
+        return []
+    cache = baseGenotype.evalCache
+
+    if cache is None:
+        return getValues(baseGenotype.evaluator, evaluatePacked(baseGenotype, packed))
+
+    # Maps each unseen key to the rows that have it. Copies inside
+    #   the same batch are only evaluated once and count as hits.
+    values = [None] * len(packed)
+    missed = {}
+    for row in range(len(packed)):
+        key = cache.getKey(packed[row])
+        if key in missed:
+            cache.hits += 1
+            missed[key].append(row)
+            continue
+        entry = cache.get(key)
+        if entry is None:
+            missed[key] = [row]
+        else:
+            values[row] = entry[0]
+
+    if len(missed) == 0:
+        return values
+    counts = evaluatePacked(baseGenotype, packed[[rows[0] for rows in missed.values()]])
+    missedValues = getValues(baseGenotype.evaluator, counts)
+    for key, value, litCount, lightV, blackV in zip(missed, missedValues, *[count.tolist() for count in counts]):
+        cache.put(key, (value, litCount, lightV, blackV))
+        for row in missed[key]:
+            values[row] = value
+    return values
+
+# Returns the three counts of every packed genotype, using the parallelEvaluator
+#   of baseGenotype if it has one and its evaluator if not.
+def evaluatePacked(baseGenotype, packed):
+    if baseGenotype.parallelEvaluator is not None:
+        return baseGenotype.parallelEvaluator.evaluatePacked(packed)
+    evaluator = baseGenotype.evaluator
+    return evaluator.evaluate(unpackGenes(packed, evaluator.numOfGenes))
+
+# Turns a (population x bytes) matrix of packed genotypes into the
+#   (population x genes) boolean matrix the evaluator works on.
+def unpackGenes(packed, numOfGenes):
+    return np.unpackbits(packed, axis=1, count=numOfGenes).view('bool')
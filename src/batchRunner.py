@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .problemCache import loadBoard
+from .baseGenotypeSetup import forceValidity
+from .experiment import getRunJob, getNumOfRuns, runConfig
+
+"""
+Runs a batch of configs in one process, as started by main.py --batch.
+
+Each problem file is read into a Board once, and forceValidity is done once
+    for each problem file that has a config with validityForcedInit. The
+    BaseGenotype of each config is still made on its own, since its evaluator
+    and cache depend on the rest of the config, but that only takes a moment
+    once the forced cells are known.
+
+With more than one worker, the runs of every config go onto one pool of
+    processes, longest first, so a long config does not hold up the end of
+    the batch. The runs are seeded the same way as in main.py, so a config
+    gives the same log as when it is run on its own. The log and solution
+    files of a config are written as soon as its last run is done. Like in
+    runPool, the run jobs are sent to each worker once when it starts, and
+    a task only names its config and run.
+
+batchConfigs: A list of (config, probPath) for the configs of the batch, each
+                already made by buildConfig.
+"""
+# The run job of every config of the batch, set once in each worker process.
+_runJobs = []
+
+def setRunJobs(runJobs):
+    global _runJobs
+    _runJobs = runJobs
+
+def callRun(configIndex, runIndex):
+    runFunction, runArgs = _runJobs[configIndex]
+    return runFunction(runIndex, *runArgs, None)
+
+def runBatch(batchConfigs, workers):
+    boards = {}
+    forcedCells = {}
+    runJobs = []
+    for config, probPath in batchConfigs:
+        if probPath not in boards:
+            boards[probPath] = loadBoard(probPath, config.get("problemCacheDir"))
+        board = boards[probPath]
+
+        # Only the Board and validityForcedInit change what forceValidity returns.
+        if config.get("validityForcedInit", False) and probPath not in forcedCells:
+            forcedCells[probPath] = forceValidity(board, config)
+        runJobs.append(getRunJob(board, config, forcedCells.get(probPath)))
+
+    if workers <= 1:
+        for (config, probPath), runJob in zip(batchConfigs, runJobs):
+            runConfig(boards[probPath], config, probPath, runJob=runJob)
+        return
+
+    # Every (config, run) pair, with the longest runs first.
+    tasks = [(i, runIndex) for i in range(len(batchConfigs))
+             for runIndex in range(getNumOfRuns(batchConfigs[i][0]))]
+    tasks.sort(key=lambda task: -getRunCost(boards[batchConfigs[task[0]][1]],
+                                            batchConfigs[task[0]][0]))
+
+    results = [[None] * getNumOfRuns(config) for config, _ in batchConfigs]
+    runsLeft = [getNumOfRuns(config) for config, _ in batchConfigs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=setRunJobs,
+                             initargs=(runJobs,)) as pool:
+        futures = {pool.submit(callRun, i, runIndex): (i, runIndex) for i, runIndex in tasks}
+
+        for future in as_completed(futures):
+            i, runIndex = futures[future]
+            results[i][runIndex] = future.result()
+            runsLeft[i] -= 1
+            if runsLeft[i] == 0:
+                config, probPath = batchConfigs[i]
+                runConfig(boards[probPath], config, probPath, runResults=results[i])
+                results[i] = None
+
+# A rough cost of one run of config, used to start the longest runs first.
+#   Every fitness evaluation takes time in proportion to the white cells. An
+#   exact search has no set length, so it is started first.
+def getRunCost(board, config):
+    if "numOfFitnessEvals" not in config:
+        return float("inf")
+    return config["numOfFitnessEvals"] * board.whiteCount
@@ -5,9 +5,6 @@ import numpy as np
 # The board itself is stored as a 2d numpy array in self.board
 class Board:
     def __init__(self, probFile):
-        # Eventually becomes list of tuples (x, y)
-        self.blackCells = []
-
         # Reads the whole file to save for the solution file later.
         # Seeks back to zero so the file can be read and processed later.
         self.wholeFile = probFile.read()
@@ -18,40 +15,152 @@ class Board:
         self.y = int(probFile.readline())
 
         self.board = self.buildBoard(probFile)
+        self.blackCells = [tuple(cell) for cell in self.blackCellArray.tolist()]
+
+        # Index of the maximal white segments used to evaluate solutions.
+        self.buildSegmentIndex()
+        self.whiteCount = len(self.whiteCellArray)
+
+        # The folder of the board in the problem cache, if it has one (see problemCache).
+        self.cachePath = None
 
-        # Eventually becomes list of tuples (x, y)
-        self.whiteCells = self.getWhiteCells()
-        self.whiteCount = len(self.whiteCells)
-        
         probFile.close()
 
+    # Makes a Board straight from a board array, such as one kept in shared
+    # memory, instead of from a problem file. The array is used as it is.
+    @classmethod
+    def fromArray(cls, boardArray):
+        board = cls.__new__(cls)
+        board.wholeFile = ""
+        board.x, board.y = boardArray.shape
+        board.board = boardArray
+        board.blackCellArray = np.argwhere(boardArray != -1)
+        board.blackCells = [tuple(cell) for cell in board.blackCellArray.tolist()]
+
+        board.buildSegmentIndex()
+        board.whiteCount = len(board.whiteCellArray)
+        board.cachePath = None
+        return board
+
+    # Makes a Board from the text of its problem file and the arrays that
+    # problemCache saved for it, so nothing has to be worked out again.
+    @classmethod
+    def fromCache(cls, wholeFile, arrays):
+        board = cls.__new__(cls)
+        board.wholeFile = wholeFile
+        for name, array in arrays.items():
+            setattr(board, name, array)
+        board.x, board.y = board.board.shape
+        board.blackCells = [tuple(cell) for cell in board.blackCellArray.tolist()]
+
+        board.numXSegments = len(board.xSegmentStarts) - 1
+        board.numYSegments = len(board.ySegmentStarts) - 1
+        board.whiteCount = len(board.whiteCellArray)
+        board.cachePath = None
+        return board
+
     def buildBoard(self, probFile):
         # White spaces are stored as -1 in this representation.
         # This seperates them from the 0 block.
         board = np.zeros((self.x, self.y), dtype='int') - 1
 
-        for line in probFile:
-            line = line.split()
-            # Subtract one from x and y because the file starts
-            # the origin at (1,1) not (0,0)
-            curX = int(line[0]) - 1
-            curY = int(line[1]) - 1
-            curZ = int(line[2])
+        # The rest of the file is one "x y value" line per black cell, so it
+        # is read as one array of numbers instead of line by line.
+        lines = np.array(probFile.read().split(), dtype='int').reshape(-1, 3)
 
-            self.blackCells.append((curX, curY))
-            board[curX][curY] = curZ
+        # Subtract one from x and y because the file starts
+        # the origin at (1,1) not (0,0)
+        self.blackCellArray = lines[:, :2] - 1
+        board[self.blackCellArray[:, 0], self.blackCellArray[:, 1]] = lines[:, 2]
 
         return board
 
-    # The white cells are gotten by creating tuples of all cells
-    # and then subtracting the black cells.
-    def getWhiteCells(self):
-        allCells = []
-        for i in range(self.x):
-            for j in range(self.y):
-                allCells.append((i,j))
+    # The white cells as a list of tuples (x, y). Only whiteCount is needed
+    # by the searches, so the list is only made when asked for.
+    @property
+    def whiteCells(self):
+        return [tuple(cell) for cell in self.whiteCellArray.tolist()]
+
+    """
+    A segment is a maximal run of white cells along one axis. A bulb lights
+        every cell of its x segment and its y segment, and two bulbs can only
+        see each other if they share a segment. Everything below is computed
+        once per board so a SolutionBoard only has to count bulbs per segment.
+
+    xSegmentOf:     (x, y) array of the id of the x segment (fixed y, varying x)
+                        holding each cell, or -1 for black cells.
+    ySegmentOf:     Same as above for the y segments (fixed x, varying y).
+    whiteCellArray: (whiteCount, 2) array of the white cells in sorted order.
+    cellIndex:      (x, y) array mapping a white cell to its row in
+                        whiteCellArray, or -1 for black cells.
+    cellXSegment:   The x segment id of each cell in whiteCellArray.
+    cellYSegment:   The y segment id of each cell in whiteCellArray.
+    xSegmentCells:  The cell indexes grouped by x segment. The cells of x segment
+                        s are xSegmentCells[xSegmentStarts[s]:xSegmentStarts[s + 1]].
+    ySegmentCells:  Same as above for the y segments, with ySegmentStarts.
+    numberedCells:  (n, 2) array of the black cells holding a number 0 to 4.
+    numberedValues: The number held by each cell in numberedCells.
+    adjWhite:       Together with adjNumbered, lists every (white cell index,
+    adjNumbered:        numbered cell index) pair of orthogonal neighbors.
+    """
+    def buildSegmentIndex(self):
+        isWhite = self.board == -1
+
+        self.xSegmentOf, self.numXSegments = self.labelSegments(isWhite.T)
+        self.xSegmentOf = self.xSegmentOf.T
+        self.ySegmentOf, self.numYSegments = self.labelSegments(isWhite)
+
+        self.whiteCellArray = np.argwhere(isWhite)
+        self.cellIndex = np.full((self.x, self.y), -1, dtype='int')
+        self.cellIndex[isWhite] = np.arange(len(self.whiteCellArray))
+        self.cellXSegment = self.xSegmentOf[isWhite]
+        self.cellYSegment = self.ySegmentOf[isWhite]
+        self.xSegmentCells, self.xSegmentStarts = self.groupBySegment(self.cellXSegment,
+                                                                      self.numXSegments)
+        self.ySegmentCells, self.ySegmentStarts = self.groupBySegment(self.cellYSegment,
+                                                                      self.numYSegments)
+
+        isNumbered = (self.board >= 0) & (self.board <= 4)
+        self.numberedCells = np.argwhere(isNumbered)
+        self.numberedValues = self.board[isNumbered]
+        numberedIndex = np.full((self.x, self.y), -1, dtype='int')
+        numberedIndex[isNumbered] = np.arange(len(self.numberedCells))
+
+        # Pairs up each numbered cell with the white cells directly beside it.
+        adjWhite = []
+        adjNumbered = []
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx = self.numberedCells[:, 0] + dx
+            ny = self.numberedCells[:, 1] + dy
+            inside = (nx >= 0) & (nx < self.x) & (ny >= 0) & (ny < self.y)
+            nx, ny = nx[inside], ny[inside]
+            numbered = np.arange(len(self.numberedCells))[inside]
+            white = self.cellIndex[nx, ny]
+            adjWhite.append(white[white != -1])
+            adjNumbered.append(numbered[white != -1])
+        self.adjWhite = np.concatenate(adjWhite)
+        self.adjNumbered = np.concatenate(adjNumbered)
+
+    # Labels the runs of True along the last axis of a 2d boolean array.
+    # Returns the labels (-1 where False) and the number of runs found.
+    @staticmethod
+    def labelSegments(isWhite):
+        previous = np.zeros_like(isWhite)
+        previous[:, 1:] = isWhite[:, :-1]
+        starts = isWhite & ~previous
+
+        labels = np.cumsum(starts.ravel()).reshape(isWhite.shape) - 1
+        labels[~isWhite] = -1
+        return labels, int(starts.sum())
 
-        return list(set(allCells) - set(self.blackCells))
+    # Returns the cell indexes sorted by segment along with where each
+    # segment starts in them.
+    @staticmethod
+    def groupBySegment(cellSegment, numOfSegments):
+        cells = np.argsort(cellSegment, kind='stable')
+        starts = np.zeros(numOfSegments + 1, dtype='int')
+        starts[1:] = np.cumsum(np.bincount(cellSegment, minlength=numOfSegments))
+        return cells, starts
 
     # This allows the user to print the board in the way that
     # the input file submits it by rotating it 90 degrees.
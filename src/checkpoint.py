@@ -0,0 +1,121 @@
+import glob
+import json
+import os
+import pickle
+import time
+
+"""
+Checkpoints of EA and MOEA runs, so a long job that was stopped can be carried
+    on with main.py --resume. They are only made if checkpointEvals or
+    checkpointSeconds is in the config file, after the first generation that
+    is that many evaluations or seconds past the last checkpoint.
+
+Each run has its own file next to the log, named logPath + ".run<N>.ckpt". It
+    is a pickled dict holding the run's population as packed genotypes and
+    values, the best so far, the eval counters, the log rows so far and the
+    state of the run's random generator and evalCache. Carrying on from it
+    gives the same run as one that was never stopped. A finished run leaves
+    its result instead, so a resumed job does not do it again.
+
+A checkpoint is written to a temporary file that is then moved over the old
+    one, so a job killed while writing one still has the last one whole. Jobs
+    that do not resume remove the checkpoints of their config first, and the
+    checkpoints are removed once the log and solution files are written.
+
+A checkpoint is only used if it was made with the same usedSeed and the same
+    config, leaving out the keys in IGNORED_KEYS, which do not change runs.
+"""
+CHECKPOINT_EXTENSION = ".ckpt"
+IGNORED_KEYS = {"usedSeed", "workers", "evalWorkers", "echoLog", "echoLogInterval",
+                "checkpointEvals", "checkpointSeconds"}
+
+class RunCheckpointer:
+    def __init__(self, config, runIndex, usedSeed):
+        self.path = getCheckpointPath(config, runIndex)
+        self.usedSeed = usedSeed
+        self.fingerprint = getFingerprint(config)
+        self.evalInterval = config.get("checkpointEvals")
+        self.secondInterval = config.get("checkpointSeconds")
+        self.isOn = self.evalInterval is not None or self.secondInterval is not None
+
+        self.lastEvals = 0
+        self.lastTime = time.monotonic()
+
+    # Returns the saved state of the run, or None if there is no checkpoint
+    #   made by the same job.
+    def load(self):
+        if not self.isOn or not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as file:
+            state = pickle.load(file)
+        if state["usedSeed"] != self.usedSeed or state["fingerprint"] != self.fingerprint:
+            print(f"{self.path} was made by a different job, so it is not used.")
+            return None
+        self.lastEvals = state.get("numOfFitnessEvals", 0)
+        return state
+
+    # Returns True if a checkpoint should be made after numOfFitnessEvals.
+    def isDue(self, numOfFitnessEvals):
+        if self.evalInterval is not None and numOfFitnessEvals - self.lastEvals >= self.evalInterval:
+            return True
+        return self.secondInterval is not None and \
+            time.monotonic() - self.lastTime >= self.secondInterval
+
+    # Saves state, a dict, as the run's checkpoint.
+    def save(self, state):
+        state = dict(state, usedSeed=self.usedSeed, fingerprint=self.fingerprint)
+        tempPath = self.path + ".tmp"
+        with open(tempPath, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tempPath, self.path)
+
+        self.lastEvals = state.get("numOfFitnessEvals", 0)
+        self.lastTime = time.monotonic()
+
+    # Saves a run that is still going. progress holds numOfFitnessEvals and
+    #   whatever else the run needs to carry on, and the log rows and the
+    #   state of the random generator and evalCache are added to it.
+    def saveProgress(self, baseGenotype, runLog, progress):
+        self.save(dict(progress, isDone=False, rows=runLog.rows,
+                       rngState=baseGenotype.rng.bit_generator.state,
+                       evalCache=baseGenotype.evalCache))
+
+    # Saves the result of a finished run if checkpoints are on. best holds
+    #   the arrays of the best individuals (see Population.getArrays).
+    def saveResult(self, runLog, best, cacheCounts):
+        if self.isOn:
+            self.save({"isDone": True, "rows": runLog.rows, "best": best, "cacheCounts": cacheCounts})
+
+# Writes the log rows of a loaded checkpoint to runLog again and, if the run
+#   was still going, puts back the state of its random generator and evalCache.
+def resumeRun(state, baseGenotype, runLog):
+    for row in state["rows"]:
+        runLog.writeRow(row)
+    if not state["isDone"]:
+        baseGenotype.rng.bit_generator.state = state["rngState"]
+        baseGenotype.evalCache = state["evalCache"]
+
+def getCheckpointPath(config, runIndex):
+    return config["logPath"] + ".run" + str(runIndex + 1) + CHECKPOINT_EXTENSION
+
+def getCheckpointPaths(config):
+    return glob.glob(glob.escape(config["logPath"]) + ".run*" + CHECKPOINT_EXTENSION)
+
+# The config as a string, leaving out the keys that do not change the runs.
+def getFingerprint(config):
+    return json.dumps({key: value for key, value in config.items() if key not in IGNORED_KEYS},
+                      sort_keys=True)
+
+# Returns the usedSeed the checkpoints of config were made with, or None if
+#   there are none.
+def getResumeSeed(config):
+    for path in getCheckpointPaths(config):
+        with open(path, 'rb') as file:
+            return pickle.load(file)["usedSeed"]
+    return None
+
+def removeCheckpoints(config):
+    for path in getCheckpointPaths(config):
+        os.remove(path)
@@ -0,0 +1,244 @@
+from array import array
+from collections import deque
+
+"""
+The class ConstraintPropagator finds the white cells that must hold a bulb and
+    the ones that never can in any solution of a board. It is run once by
+    forceValidity when validityForcedInit is in the config file.
+
+Each white cell is undecided, a bulb or blocked. Deciding a cell can only
+    change the rules of the numbered cells beside it and of the segments it is
+    in, so those are put on a worklist and only they are checked again. The
+    rules are:
+
+    A bulb lights its whole x and y segment and blocks every other cell in
+        them, since two bulbs may not see each other.
+    A numbered cell with as many bulbs beside it as its number blocks the
+        rest of its undecided neighbors. One that needs every undecided
+        neighbor to reach its number makes them all bulbs.
+    An unlit cell that only one undecided cell can light (itself or one in
+        its segments) makes that cell a bulb.
+
+If the rules ever contradict each other the board has no solution, and
+    nothing is forced.
+
+Cells are numbered the same way as board.whiteCellArray, and the state is
+    kept in bytearrays and flat arrays so each step is a cheap lookup.
+
+Every change is also put on a trail so a search can go back to an earlier
+    state with undo, as the exact solver does. Each decided cell keeps the
+    cells that made the rules decide it as its reason, or None if the search
+    chose it, and a Contradiction holds the cells that broke a rule, so the
+    search can find which of its choices led there. Without useNumbers the
+    numbered cells are ignored, for when enforceBlackCellConstraint is false.
+"""
+UNDECIDED = 0
+BULB = 1
+BLOCKED = 2
+
+# cells are decided cells that can not all keep their states.
+class Contradiction(Exception):
+    def __init__(self, cells):
+        super().__init__()
+        self.cells = cells
+
+class ConstraintPropagator:
+    def __init__(self, board, useNumbers=True):
+        self.board = board
+        self.useNumbers = useNumbers
+        numOfCells = board.whiteCount
+        self.cellX = board.cellXSegment.tolist()
+        self.cellY = board.cellYSegment.tolist()
+        self.xCells = getSegmentLists(board.xSegmentCells, board.xSegmentStarts)
+        self.yCells = getSegmentLists(board.ySegmentCells, board.ySegmentStarts)
+
+        # The white neighbors of every numbered cell and the numbered
+        #   neighbors of every white cell.
+        self.numberedValues = board.numberedValues.tolist()
+        self.numberedNeighbors = [[] for _ in range(len(self.numberedValues))]
+        self.cellNumbered = [[] for _ in range(numOfCells)]
+        for cell, numbered in zip(board.adjWhite.tolist(), board.adjNumbered.tolist()):
+            self.numberedNeighbors[numbered].append(cell)
+            self.cellNumbered[cell].append(numbered)
+
+        self.state = bytearray(numOfCells)
+        self.lit = bytearray(numOfCells)
+        self.litCount = 0
+        self.reasons = [()] * numOfCells
+        self.xUndecided = array('q', [len(cells) for cells in self.xCells])
+        self.yUndecided = array('q', [len(cells) for cells in self.yCells])
+
+        # Decided cells are put on the trail as they are, newly lit cells as ~cell.
+        self.trail = []
+
+        # Work waiting to be checked, each kept at most once in its queue.
+        self.numberedQueue = deque()
+        self.numberedQueued = bytearray(len(self.numberedValues))
+        self.xQueue = deque()
+        self.xQueued = bytearray(len(self.xCells))
+        self.yQueue = deque()
+        self.yQueued = bytearray(len(self.yCells))
+
+    # Runs the rules until nothing changes. Returns (alwaysLightCells,
+    #   neverLightCells) as lists of (x, y), or two empty lists if the board
+    #   has no solution.
+    def propagate(self):
+        self.queueAll()
+        try:
+            self.run()
+        except Contradiction:
+            return [], []
+        return self.getCells(BULB), self.getCells(BLOCKED)
+
+    # Returns the cells in state as a list of (x, y).
+    def getCells(self, state):
+        whiteCells = self.board.whiteCellArray.tolist()
+        return [tuple(whiteCells[cell]) for cell in range(len(self.state))
+                if self.state[cell] == state]
+
+    # Queues every rule, as is needed before the first run.
+    def queueAll(self):
+        if self.useNumbers:
+            for numbered in range(len(self.numberedValues)):
+                self.queueNumbered(numbered)
+        for segment in range(len(self.xCells)):
+            self.queueSegment(self.xQueue, self.xQueued, segment)
+
+    # Checks queued rules until the queues are empty. Raises a Contradiction,
+    #   and leaves the rest of the queue, if the rules can not all hold.
+    def run(self):
+        while self.numberedQueue or self.xQueue or self.yQueue:
+            if self.numberedQueue:
+                numbered = self.numberedQueue.popleft()
+                self.numberedQueued[numbered] = 0
+                self.checkNumbered(numbered)
+            elif self.xQueue:
+                segment = self.xQueue.popleft()
+                self.xQueued[segment] = 0
+                self.checkSegment(self.xCells[segment])
+            else:
+                segment = self.yQueue.popleft()
+                self.yQueued[segment] = 0
+                self.checkSegment(self.yCells[segment])
+
+    # Empties the queues, as is needed after a Contradiction.
+    def clearQueues(self):
+        for queue, queued in ((self.numberedQueue, self.numberedQueued),
+                              (self.xQueue, self.xQueued), (self.yQueue, self.yQueued)):
+            for item in queue:
+                queued[item] = 0
+            queue.clear()
+
+    # Takes back every change made since the trail had length mark.
+    def undo(self, mark):
+        trail = self.trail
+        while len(trail) > mark:
+            cell = trail.pop()
+            if cell < 0:
+                self.lit[~cell] = 0
+                self.litCount -= 1
+            else:
+                self.state[cell] = UNDECIDED
+                self.xUndecided[self.cellX[cell]] += 1
+                self.yUndecided[self.cellY[cell]] += 1
+
+    def queueNumbered(self, numbered):
+        if not self.numberedQueued[numbered]:
+            self.numberedQueued[numbered] = 1
+            self.numberedQueue.append(numbered)
+
+    def queueSegment(self, queue, queued, segment):
+        if not queued[segment]:
+            queued[segment] = 1
+            queue.append(segment)
+
+    # Takes cell out of the undecided counts and queues whatever depends on it.
+    def decide(self, cell, state, reason):
+        self.state[cell] = state
+        self.reasons[cell] = reason
+        self.trail.append(cell)
+        self.xUndecided[self.cellX[cell]] -= 1
+        self.yUndecided[self.cellY[cell]] -= 1
+        if self.useNumbers:
+            for numbered in self.cellNumbered[cell]:
+                self.queueNumbered(numbered)
+        self.queueSegment(self.xQueue, self.xQueued, self.cellX[cell])
+        self.queueSegment(self.yQueue, self.yQueued, self.cellY[cell])
+
+    def placeBulb(self, cell, reason=None):
+        if self.state[cell] == BULB:
+            return
+        if self.state[cell] == BLOCKED:
+            raise Contradiction((cell,) + (reason or ()))
+        self.decide(cell, BULB, reason)
+
+        # Every other cell in its segments is lit and can no longer hold a bulb.
+        for other in self.getSeenCells(cell):
+            if not self.lit[other]:
+                self.lit[other] = 1
+                self.litCount += 1
+                self.trail.append(~other)
+            if other != cell:
+                self.block(other, (cell,))
+
+    def block(self, cell, reason=None):
+        if self.state[cell] == BLOCKED:
+            return
+        if self.state[cell] == BULB:
+            raise Contradiction((cell,) + (reason or ()))
+        self.decide(cell, BLOCKED, reason)
+
+    def checkNumbered(self, numbered):
+        value = self.numberedValues[numbered]
+        bulbs = []
+        blocked = []
+        undecided = []
+        for cell in self.numberedNeighbors[numbered]:
+            if self.state[cell] == BULB:
+                bulbs.append(cell)
+            elif self.state[cell] == BLOCKED:
+                blocked.append(cell)
+            else:
+                undecided.append(cell)
+
+        if len(bulbs) > value:
+            raise Contradiction(tuple(bulbs))
+        if len(bulbs) + len(undecided) < value:
+            raise Contradiction(tuple(blocked))
+        if len(bulbs) == value:
+            for cell in undecided:
+                self.block(cell, tuple(bulbs))
+        elif len(bulbs) + len(undecided) == value:
+            for cell in undecided:
+                self.placeBulb(cell, tuple(blocked))
+
+    # Checks every unlit cell of a segment for the cells it can be lit by.
+    def checkSegment(self, cells):
+        for cell in cells:
+            if self.lit[cell]:
+                continue
+            candidates = self.xUndecided[self.cellX[cell]] + self.yUndecided[self.cellY[cell]]
+            if self.state[cell] == UNDECIDED:
+                candidates -= 1
+            if candidates == 0:
+                raise Contradiction(tuple(self.getSeenCells(cell)))
+            if candidates == 1:
+                seenCells = self.getSeenCells(cell)
+                candidate = self.findUndecided(cell)
+                self.placeBulb(candidate, tuple(other for other in seenCells if other != candidate))
+
+    # Returns the cells in the segments of cell, itself included.
+    def getSeenCells(self, cell):
+        return self.xCells[self.cellX[cell]] + self.yCells[self.cellY[cell]]
+
+    # Returns the one undecided cell that can light cell.
+    def findUndecided(self, cell):
+        for other in self.getSeenCells(cell):
+            if self.state[other] == UNDECIDED:
+                return other
+
+# Splits the cells grouped by segment into one list per segment.
+def getSegmentLists(segmentCells, segmentStarts):
+    cells = segmentCells.tolist()
+    starts = segmentStarts.tolist()
+    return [cells[starts[i]:starts[i + 1]] for i in range(len(starts) - 1)]
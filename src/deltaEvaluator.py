@@ -0,0 +1,144 @@
+import numpy as np
+from .board import Board
+from .batchEvaluator import getValue
+
+"""
+The class DeltaEvaluator keeps the counts behind a SolutionBoard so that a
+    single bulb can be added or removed without rebuilding the board. It is
+    made from an already evaluated SolutionBoard:
+
+    delta = DeltaEvaluator(sol)
+    litCount, lightViolations, blackCellViolations = delta.flip((x, y))
+
+or, without a SolutionBoard, from the white cell indexes of the bulbs with
+    DeltaEvaluator.fromBulbs(board, config, bulbCells). setBulbs starts the
+    same DeltaEvaluator over on other bulbs, as the local search does for
+    each individual.
+
+Flipping the same cell again undoes the change. The variables kept are:
+
+xBulbs:            The number of bulbs in each x segment of the board.
+yBulbs:            The number of bulbs in each y segment of the board.
+illumination:      For each white cell, the number of bulbs in its x segment
+                    plus the number in its y segment. A cell is lit when
+                    this is above zero.
+neighboringLights: For each numbered black cell, the number of bulbs beside it.
+
+A flip only touches the two segments of the flipped cell and the numbered
+    cells beside it, so it costs about the length of those two segments.
+"""
+class DeltaEvaluator:
+    def __init__(self, sol):
+        board = sol.startBoard
+        self.setUp(board, sol.config)
+
+        self.isBulb[sol.bulbCells] = True
+        self.xBulbs = np.copy(sol.xBulbs)
+        self.yBulbs = np.copy(sol.yBulbs)
+        self.illumination = self.xBulbs[board.cellXSegment] + self.yBulbs[board.cellYSegment]
+
+        self.litCount = sol.litCount
+        self.lightViolations = sol.lightViolations
+        self.blackCellViolations = sol.blackCellViolations
+        self.neighboringLights = self.countNeighboringLights()
+
+    # Makes a DeltaEvaluator for the bulbs on the white cells bulbCells.
+    @classmethod
+    def fromBulbs(cls, board, config, bulbCells):
+        delta = cls.__new__(cls)
+        delta.setUp(board, config)
+        delta.setBulbs(bulbCells)
+        return delta
+
+    def setUp(self, board, config):
+        self.board = board
+        self.config = config
+        self.isBulb = np.zeros(board.whiteCount, dtype='bool')
+
+        # The numbered cells beside each white cell, grouped by white cell.
+        self.adjOrder, self.adjStarts = Board.groupBySegment(board.adjWhite, board.whiteCount)
+
+    # Starts over with bulbs on the white cells bulbCells and nowhere else,
+    #   counted the same way as SolutionBoard.
+    def setBulbs(self, bulbCells):
+        board = self.board
+        self.isBulb[:] = False
+        self.isBulb[bulbCells] = True
+
+        self.xBulbs = np.bincount(board.cellXSegment[bulbCells], minlength=board.numXSegments)
+        self.yBulbs = np.bincount(board.cellYSegment[bulbCells], minlength=board.numYSegments)
+        self.illumination = self.xBulbs[board.cellXSegment] + self.yBulbs[board.cellYSegment]
+
+        self.litCount = int(np.count_nonzero(self.illumination))
+        self.lightViolations = 2 * int(np.maximum(self.xBulbs - 1, 0).sum()) + \
+                               2 * int(np.maximum(self.yBulbs - 1, 0).sum())
+        self.neighboringLights = self.countNeighboringLights()
+        self.blackCellViolations = 0
+        if self.config["enforceBlackCellConstraint"]:
+            self.blackCellViolations = int(np.abs(self.neighboringLights - board.numberedValues).sum())
+
+    # The number of bulbs beside each numbered cell.
+    def countNeighboringLights(self):
+        board = self.board
+        return np.bincount(board.adjNumbered, weights=self.isBulb[board.adjWhite],
+                           minlength=len(board.numberedCells)).astype('int')
+
+    # Adds a bulb to the white cell (x, y) if it has none, or removes it if it
+    #   does. Returns the new lit count, light violations and black cell violations.
+    def flip(self, cell):
+        x, y = cell
+        return self.flipIndex(self.board.cellIndex[x][y])
+
+    # The same as flip, for the white cell with index in board.whiteCellArray.
+    def flipIndex(self, index):
+        board = self.board
+        if self.isBulb[index]:
+            change = -1
+        else:
+            change = 1
+        self.isBulb[index] = not self.isBulb[index]
+
+        xSegment = board.cellXSegment[index]
+        self.changeSegment(self.xBulbs, xSegment, change)
+        start, end = board.xSegmentStarts[xSegment], board.xSegmentStarts[xSegment + 1]
+        self.changeIllumination(board.xSegmentCells[start:end], change)
+
+        ySegment = board.cellYSegment[index]
+        self.changeSegment(self.yBulbs, ySegment, change)
+        start, end = board.ySegmentStarts[ySegment], board.ySegmentStarts[ySegment + 1]
+        self.changeIllumination(board.ySegmentCells[start:end], change)
+
+        # Checks to see if the config is enforcing the black number constraint.
+        if self.config["enforceBlackCellConstraint"]:
+            for pair in self.adjOrder[self.adjStarts[index]:self.adjStarts[index + 1]]:
+                numbered = board.adjNumbered[pair]
+                value = board.numberedValues[numbered]
+                before = abs(self.neighboringLights[numbered] - value)
+                self.neighboringLights[numbered] += change
+                self.blackCellViolations += abs(self.neighboringLights[numbered] - value) - before
+
+        return self.litCount, self.lightViolations, self.blackCellViolations
+
+    # Adds change to the bulbs of one segment. Every neighboring pair of bulbs
+    #   in a segment counts as two light violations, just like in SolutionBoard.
+    def changeSegment(self, bulbs, segment, change):
+        if change == 1 and bulbs[segment] >= 1:
+            self.lightViolations += 2
+        bulbs[segment] += change
+        if change == -1 and bulbs[segment] >= 1:
+            self.lightViolations -= 2
+
+    # Adds change to the illumination of the given cells and updates the lit count.
+    def changeIllumination(self, cells, change):
+        wasLit = np.count_nonzero(self.illumination[cells])
+        self.illumination[cells] += change
+        self.litCount += np.count_nonzero(self.illumination[cells]) - wasLit
+
+    # The score, or moea tuple for the MOEA, of the current bulbs.
+    def getValue(self):
+        return getValue(self.config, self.board.whiteCount, int(self.litCount),
+                        int(self.lightViolations), int(self.blackCellViolations))
+
+    # The current bulbs as a list of tuples (x, y), ready for a SolutionBoard.
+    def getLightPositions(self):
+        return [(x, y) for x, y in self.board.whiteCellArray[self.isBulb].tolist()]
@@ -0,0 +1,52 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+"""
+The class EvalCache remembers the evaluation of genotypes that were already
+    seen so that copies made by crossover and mutation are not scored again.
+    It is only made if evalCacheSize is in the config file.
+
+maxSize:  The most entries kept. Once full, the least recently used is dropped.
+entries:  An OrderedDict from key to (value, litCount, lightViolations,
+            blackCellViolations), where value is the score or the moea tuple.
+hits:     The number of lookups answered from the cache.
+misses:   The number of lookups that had to be evaluated.
+
+Keys are a 16 byte hash of the packed genotype, keyed with a hash of the
+    alwaysLightCells, so they stay small no matter how big the board is.
+"""
+class EvalCache:
+    def __init__(self, maxSize, alwaysLightCells=[]):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        alwaysLight = np.array(alwaysLightCells, dtype='int64').reshape(-1, 2)
+        self.hashKey = hashlib.blake2b(alwaysLight.tobytes(), digest_size=16).digest()
+
+    # Returns the key for a packed genotype.
+    def getKey(self, genotype):
+        return hashlib.blake2b(genotype.tobytes(), digest_size=16, key=self.hashKey).digest()
+
+    # Returns the stored entry for key, or None if it is not in the cache.
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+# The cache counters in the format they are written to the log file.
+def getCacheTxt(hits, misses):
+    return "Eval Cache Hits: " + str(hits) + "\n" + \
+           "Eval Cache Misses: " + str(misses) + "\n"
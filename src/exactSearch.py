@@ -0,0 +1,71 @@
+import json
+from .solutionBoard import SolutionBoard
+from .exactSolver import ExactSolver
+from .logWriter import RunLog
+
+# Writes the log to the LogWriter log and returns the text to put
+#   at the end of the solution file. The search is done here unless
+#   runResults, an iterable holding the result of seededRunExact (such as
+#   the one from runPool.mapRuns), is given.
+#
+# The search has no randomness, so it is only done once whatever numOfRuns is.
+def runAllExact(board, config, probPath, log, runResults=None):
+    log.write("Result Log\n\n")
+
+    log.write("Problem Instance File: " + probPath + "\n")
+    log.write("Solution File: " + config["solPath"] + "\n")
+    log.write("Random Seed: " + str(config["usedSeed"]) + "\n\n")
+
+    # Delelte usedSeed because it is not a user parameter, thus should not be put in the log file.
+    del config["usedSeed"]
+
+    log.write("Config Used:\n")
+    log.write(json.dumps(config) + "\n\n")
+
+    if runResults is None:
+        runResults = [seededRunExact(0, board, config, log)]
+    runLog, solver, bestSol = next(iter(runResults))
+    log.writeRun(runLog)
+    log.write("\n")
+
+    if solver.isSolved:
+        result = "Solved"
+    elif solver.isComplete:
+        result = "No solution exists"
+    else:
+        result = "Budget used up"
+    log.write("Search Result: " + result + "\n")
+    log.write("Nodes: " + str(solver.nodes) + "\n")
+    log.write("Seconds: " + str(solver.seconds) + "\n")
+    log.write("Nodes per second: " + str(solver.nodes / max(solver.seconds, 1e-9)) + "\n")
+    log.write("Best of all runs: " + str(bestSol.score))
+
+    # This will return a string of text that can be put onto the end
+    #   of the solution output file.
+    return bestSol.getTxt()
+
+# Returns the function that does the search and the arguments it takes between
+#   the run index and the log writer (see runPool.mapRuns). The search makes
+#   its own deductions, so it does not use forcedCells.
+def getRunJobExact(board, config, usedSeed, forcedCells=None):
+    return seededRunExact, (board, config)
+
+# Does the search. Returns its RunLog, the ExactSolver and the SolutionBoard
+#   of the best placement found.
+#
+# The rows of the log are the nodes visited so far, the lit fraction of the
+#   current node and the best lit fraction so far, in the same columns as the
+#   EA's evals, average and best.
+def seededRunExact(runIndex, board, config, logWriter):
+    runLog = RunLog(logWriter, config.get("telemetry", False))
+    runLog.write("Run " + str(runIndex + 1) + '\n')
+
+    whiteCount = board.whiteCount
+    solver = ExactSolver(board, config)
+    solver.solve(lambda nodes, litCount, bestLitCount:
+                 runLog.writeRow((nodes, litCount / whiteCount, max(bestLitCount, 0) / whiteCount)))
+    bestFraction = max(solver.bestLitCount, 0) / whiteCount
+    runLog.writeRow((solver.nodes, bestFraction, bestFraction))
+
+    bestSol = SolutionBoard(board, config, solver.getLightPositions())
+    return runLog, solver, bestSol
@@ -0,0 +1,173 @@
+import time
+import numpy as np
+from .constraintPropagator import ConstraintPropagator, Contradiction, BULB, UNDECIDED
+
+"""
+The class ExactSolver searches for a placement of bulbs that lights every
+    white cell with no two bulbs seeing each other and, if
+    enforceBlackCellConstraint is true, every number met. It is used when
+    searchAlgorithm is "Exact" in the config file.
+
+The search is depth first on top of a ConstraintPropagator. At every node the
+    unlit cell with the fewest cells left that could light it is picked, and
+    one of those cells is chosen as a bulb. After each choice the rules are run
+    again, and going back up only undoes the changes on the propagator's trail,
+    so nothing is copied.
+
+When the rules break, the reasons of the cells that broke them are followed
+    back to the choices they came from. The search goes straight back to the
+    last of those choices and blocks its cell instead, with the rest of those
+    choices as its reason, so the choices in between are skipped. On a large
+    board they are mostly about far away cells, and going back through each
+    of them in turn would try every mix of them again for nothing.
+
+The search stops when a solution is found, when every choice has been tried,
+    or when exactNodeLimit nodes or exactTimeLimit seconds from the config
+    file are used up. The most lit cells seen in a state that broke no rule
+    is kept as the best placement, so there is always an answer.
+
+nodes:       The number of search nodes visited.
+seconds:     How long the search took.
+isSolved:    True if a solution was found, which is then the best placement.
+isComplete:  True if the search ended on its own, so a board without a
+                solution is proven to have none.
+"""
+# A progress row is handed to onProgress every this many nodes.
+PROGRESS_NODES = 10000
+
+class ExactSolver:
+    def __init__(self, board, config):
+        self.board = board
+        self.propagator = ConstraintPropagator(board, config["enforceBlackCellConstraint"])
+        self.maxNodes = config.get("exactNodeLimit")
+        self.maxSeconds = config.get("exactTimeLimit")
+
+        self.nodes = 0
+        self.seconds = 0
+        self.isSolved = False
+        self.isComplete = False
+        self.bestLitCount = -1
+        self.bestBulbs = np.zeros(0, dtype='int')
+
+        # Array views of the propagator's state for picking the next cell.
+        propagator = self.propagator
+        self.state = np.frombuffer(propagator.state, dtype='uint8')
+        self.lit = np.frombuffer(propagator.lit, dtype='uint8')
+        self.xUndecided = np.frombuffer(propagator.xUndecided, dtype='int64')
+        self.yUndecided = np.frombuffer(propagator.yUndecided, dtype='int64')
+        self.cellX = board.cellXSegment
+        self.cellY = board.cellYSegment
+
+    # Runs the search. onProgress, if given, is called with
+    #   (nodes, litCount, bestLitCount) every PROGRESS_NODES nodes.
+    def solve(self, onProgress=None):
+        propagator = self.propagator
+        start = time.perf_counter()
+
+        propagator.queueAll()
+        conflict = self.runRules()
+
+        # What holds before any choice needs no reason.
+        for cell in propagator.trail:
+            if cell >= 0:
+                propagator.reasons[cell] = ()
+
+        # Each entry is the trail length before a bulb choice and its cell.
+        choices = []
+        choiceLevels = {}
+        while True:
+            self.nodes += 1
+            if onProgress is not None and self.nodes % PROGRESS_NODES == 0:
+                onProgress(self.nodes, propagator.litCount, self.bestLitCount)
+
+            if conflict is None:
+                if propagator.litCount == self.board.whiteCount:
+                    self.keepIfBest()
+                    self.isSolved = True
+                    self.isComplete = True
+                    break
+                if self.isOverBudget(start):
+                    self.keepIfBest()
+                    break
+
+                cell = propagator.findUndecided(self.pickCell())
+                choices.append((len(propagator.trail), cell))
+                choiceLevels[cell] = len(choices)
+                conflict = self.tryChoice(propagator.placeBulb, cell, None)
+                continue
+
+            # Goes back to the last choice that led to the conflict and blocks it.
+            culprits = self.findChoices(conflict, choiceLevels)
+            if len(culprits) == 0:
+                self.isComplete = True
+                break
+            level = max(choiceLevels[cell] for cell in culprits)
+            mark, cell = choices[level - 1]
+            for _, undone in choices[level - 1:]:
+                del choiceLevels[undone]
+            del choices[level - 1:]
+            propagator.undo(mark)
+            self.keepIfBest()
+            if self.isOverBudget(start):
+                break
+            culprits.discard(cell)
+            conflict = self.tryChoice(propagator.block, cell, tuple(culprits))
+
+        self.seconds = time.perf_counter() - start
+
+    # Follows the reasons of the cells in conflict back to the choices in
+    #   choiceLevels that they came from and returns those as a set.
+    def findChoices(self, conflict, choiceLevels):
+        reasons = self.propagator.reasons
+        culprits = set()
+        seen = set()
+        stack = list(conflict)
+        while stack:
+            cell = stack.pop()
+            if cell in seen:
+                continue
+            seen.add(cell)
+            if cell in choiceLevels:
+                culprits.add(cell)
+            else:
+                stack.extend(reasons[cell])
+        return culprits
+
+    # Returns the unlit cell with the fewest undecided cells that could light it.
+    def pickCell(self):
+        unlit = np.flatnonzero(self.lit == 0)
+        candidates = self.xUndecided[self.cellX[unlit]] + self.yUndecided[self.cellY[unlit]] - \
+                     (self.state[unlit] == UNDECIDED)
+        return int(unlit[np.argmin(candidates)])
+
+    # Makes a choice and runs the rules. Returns the cells of the
+    #   Contradiction if they can not all hold, else None.
+    def tryChoice(self, choice, cell, reason):
+        try:
+            choice(cell, reason)
+        except Contradiction as contradiction:
+            self.propagator.clearQueues()
+            return contradiction.cells
+        return self.runRules()
+
+    def runRules(self):
+        try:
+            self.propagator.run()
+        except Contradiction as contradiction:
+            self.propagator.clearQueues()
+            return contradiction.cells
+        return None
+
+    def keepIfBest(self):
+        if self.propagator.litCount > self.bestLitCount:
+            self.bestLitCount = self.propagator.litCount
+            self.bestBulbs = np.flatnonzero(self.state == BULB)
+
+    def isOverBudget(self, start):
+        if self.maxNodes is not None and self.nodes >= self.maxNodes:
+            return True
+        return self.maxSeconds is not None and time.perf_counter() - start >= self.maxSeconds
+
+    # The bulbs of the best placement as a list of (x, y).
+    def getLightPositions(self):
+        return [tuple(cell) for cell in self.board.whiteCellArray[self.bestBulbs].tolist()]
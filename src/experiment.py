@@ -0,0 +1,52 @@
+from importlib import import_module
+from .runPool import mapRuns, getNumOfRuns
+from .logWriter import LogWriter
+from .checkpoint import removeCheckpoints
+
+# The module of each searchAlgorithm and the names of its runAll and
+#   getRunJob functions. Only the module of the searchAlgorithm that is
+#   used gets imported.
+ALGORITHMS = {
+    "Random Search": ("randomSearch", "runAllRandom", "getRunJobRandom"),
+    "EA": ("randomEA", "runAllEA", "getRunJobEA"),
+    "MOEA": ("randomMOEA", "runAllMOEA", "getRunJobMOEA"),
+    "Exact": ("exactSearch", "runAllExact", "getRunJobExact"),
+}
+
+# Returns the runAll and getRunJob functions of the searchAlgorithm of config.
+def getAlgorithm(config):
+    moduleName, runAllName, getRunJobName = ALGORITHMS[config["searchAlgorithm"]]
+    module = import_module("." + moduleName, __package__)
+    return getattr(module, runAllName), getattr(module, getRunJobName)
+
+# Returns the function that does one run of config and the arguments it takes
+#   between the run index and the log writer. forcedCells can be given when
+#   forceValidity was already run on the board.
+def getRunJob(board, config, forcedCells=None):
+    getRunJobFunction = getAlgorithm(config)[1]
+    return getRunJobFunction(board, config, config["usedSeed"], forcedCells)
+
+# Does every run of config and writes its log and solution files.
+#
+# runJob is from getRunJob and runResults holds the results of the runs in run
+#   order if they were already done. Given neither, the runAll function of
+#   the searchAlgorithm sets up and does the runs itself.
+def runConfig(board, config, probPath, runJob=None, runResults=None):
+    # The log is written as the runs go instead of all at once at the end.
+    log = LogWriter(config["logPath"], config)
+
+    if runResults is None and runJob is not None:
+        runResults = mapRuns(runJob[0], config, runJob[1], log)
+    runAll = getAlgorithm(config)[0]
+    solTxt = runAll(board, config, probPath, log, runResults)
+
+    log.close()
+
+    sol = LogWriter(config["solPath"])
+    sol.write(board.wholeFile + "\n")
+    sol.write(solTxt)
+    sol.close()
+
+    # The runs are all in the log and solution files, so their checkpoints
+    #   are no longer needed.
+    removeCheckpoints(config)
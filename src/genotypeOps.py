@@ -1,162 +1,199 @@
-import random
-import operator
-from .individualGenotype import IndividualGenotype
+import numpy as np
+from .population import makeOffspring
 
-# This is where the parent selection and offspring creation happen.
-def breed(population, board, config):
-    offspring = []
+# Rounds of drawing again before a second parent is drawn with the first
+#   one's weight set to zero.
+RESAMPLE_ROUNDS = 3
 
-    # Offspring is passed by reference so it changes in all methods below.
+# This is where the parent selection and offspring creation happen. Takes
+#   and returns a Population.
+def breed(population, board, config):
+    profiler = population.baseGenotype.profiler
     if "parentTournyK" in config:
-        parentTourny(population, board, config, offspring)
+        parents1, parents2 = parentTourny(population, board, config)
     elif config["parentFitnessProp"]:
-        parentFitnessProp(population, board, config, offspring)
+        parents1, parents2 = parentFitnessProp(population, board, config)
     elif config["parentUniform"]:
-        parentUniform(population, board, config, offspring)
+        parents1, parents2 = parentUniform(population, board, config)
+    if profiler is not None:
+        profiler.lap("parentSelection")
+    offspring = makeOffspring(population, parents1, parents2)
+    if profiler is not None:
+        profiler.lap("offspring")
+
+    # All of the offspring are scored together in one batch.
+    offspring.evaluate()
+    if profiler is not None:
+        profiler.lap("evaluation")
+
+    baseGenotype = population.baseGenotype
+    if baseGenotype.localSearch is not None:
+        baseGenotype.localSearch.improve(offspring, baseGenotype.rng)
+        if profiler is not None:
+            profiler.lap("localSearch")
 
     if config["commaSurvival"]:
         return offspring
     else:
-        return population + offspring
+        return population.concat(offspring)
 
-# Selects the survivors and returns a new array with mu population size.
+# Selects the survivors and returns a new Population with mu population size.
 def survivalSelection(population, board, config):
+    return population.take(getSurvivorIndexes(population, board, config))
+
+# Returns the indexes of the survivors in population.
+#
+# Every survival selection below works on the array of scores and picks
+#   the survivors as indexes into population.
+def getSurvivorIndexes(population, board, config):
     if "survivalTournyK" in config:
         return survivalTourny(population, board, config)
     elif config["survivalTruncation"]:
-        newPop = sorted(population, key=operator.attrgetter("score"))
-        newPop = newPop[::-1]
-        return newPop[:config["mu"]]
+        return survivalTruncation(population, board, config)
     elif config["survivalUniform"]:
         return survivalUniform(population, board, config)
     elif config["survivalFitnessProp"]:
         return survivalFitnessProp(population, board, config)
 
-def survivalTourny(population, board, config):
-    popCopy = [] # Need the copy so that population in parent function is unaffected.
-    for i in range(len(population)):
-        popCopy.append(population[i])
-    newPop = []
-    while len(newPop) < config["mu"]:
-        tourny = random.sample(popCopy, k=config["survivalTournyK"])
-        tourny.sort(key=operator.attrgetter("score")) # This sorts the list by the score variable.
-        #tourny = tourny[::-1] # This reverses the list, putting the best fitnesses at the front.
-
-        newPop.append(tourny[-1])
-        # Below removes the survivor from the population so it is not chosen twice.
-        popCopy.remove(tourny[-1])
-
-    return newPop
+# Keeps the mu best scores. Ties at the cut are kept in no set order.
+def survivalTruncation(population, board, config):
+    return getTopIndexes(population.scores, config["mu"])
 
+def survivalTourny(population, board, config):
+    rng = population.baseGenotype.rng
+    k = config["survivalTournyK"]
+    scores = population.scores.tolist()
+    if k > len(population) - config["mu"] + 1:
+        raise ValueError("Sample larger than population or is negative")
+
+    # The first numLeft entries of left are the individuals not yet chosen.
+    #   A survivor is swapped out to the end so it is not chosen twice. The
+    #   survivors are picked one at a time, so plain lists are faster here.
+    left = list(range(len(population)))
+    numLeft = len(population)
+    survivors = []
+    for draws in rng.random((config["mu"], k)).tolist():
+        tourny = [int(draw * numLeft) for draw in draws]
+        if len(set(tourny)) < k:
+            tourny = drawDistinct(rng, numLeft, 1, k)[0].tolist()
+        winner = max(tourny, key=lambda i: scores[left[i]])
+        survivors.append(left[winner])
+        numLeft -= 1
+        left[winner], left[numLeft] = left[numLeft], left[winner]
+
+    return np.array(survivors, dtype='int')
+
+# Keeps mu individuals picked at random without replacement.
 def survivalUniform(population, board, config):
-    popCopy = [] # Need the copy so that population in parent function is unaffected.
-    for i in range(len(population)):
-        popCopy.append(population[i])
-    newPop = []
-
-    while len(newPop) < config["mu"]:
-        survivor = random.choice(popCopy)
-        popCopy.remove(survivor)
-        newPop.append(survivor)
-
-    return popCopy
-
+    rng = population.baseGenotype.rng
+    return rng.permutation(len(population))[:config["mu"]]
+
+# Keeps mu individuals picked one at a time with chances in proportion to
+#   their weights, without replacement.
+#
+# Giving each individual the key log(u) / weight for a uniform u and keeping
+#   the mu largest keys picks them with the same chances as drawing one at a
+#   time and setting each pick's weight to zero (Efraimidis and Spirakis).
 def survivalFitnessProp(population, board, config):
-    newPop = []
-
-    weights = [0 for _ in range(len(population))]
-
-    minScore = 0
-    for i in range(len(population)):
-        curScore = population[i].score
-        if curScore < minScore:
-            minScore = curScore
-        weights[i] = curScore
+    rng = population.baseGenotype.rng
+    weights = population.scores
 
     # The minScore ensures that all weights are at least 1e-99. This
     #   now allows for negative fitnesses. Each weight gets the minScore
     #   value (either negative or zero) subtracted from it so that each weight
     #   goes up proportionally.
-    weights = [weight - minScore + 1e-99 for weight in weights]
-
-    for i in range(config["mu"]):
-        survivor = random.choices(population, weights=weights, k=1)
-        survivor = survivor[0]
-        newPop.append(survivor)
-
-        index = population.index(survivor)
-        weights[index] = 0 # This ensures that it will not be duplicated.
-
-    return newPop
-
-def parentTourny(population, board, config, offspring):
-    for i in range(config["lambda"]):
-        tourny1 = random.sample(population, k=config["parentTournyK"])
-        tourny1.sort(key=operator.attrgetter("score")) # This sorts the list by the score variable.
-        parent1 = tourny1[-1]
-        population.remove(parent1) # Remove temporarily to avoid asexual reproduction.
-
-        tourny2 = random.sample(population, k=config["parentTournyK"])
-        tourny2.sort(key=operator.attrgetter("score")) # This sorts the list by the score variable.
-        parent2 = tourny2[-1]
-        population.append(parent1) # Add back the first parent.
-
-        # Offspring creation happens here by adding the two parents.
-        # This uses a custom addition operator of the IndividualGenotype class
-        #   in order to recombine the parernts and mutate the child.
-        baby = parent1 + parent2
-        offspring.append(baby)
-
-def parentFitnessProp(population, board, config, offspring):
-    weights = [0 for _ in range(len(population))]
-    totalWithScores = 0
-
-    minScore = 0
-    for i in range(len(population)):
-        curScore = population[i].score
-        if curScore < minScore:
-            minScore = curScore
-        weights[i] = curScore
+    weights = weights - min(weights.min(), 0) + 1e-99
+
+    with np.errstate(divide="ignore"):
+        keys = np.log(rng.random(len(weights))) / weights
+    return getTopIndexes(keys, config["mu"])
+
+# Returns the indexes of the count largest values, in no set order.
+def getTopIndexes(values, count):
+    if count >= len(values):
+        return np.arange(len(values))
+    return np.argpartition(-values, count - 1)[:count]
+
+# Every parent selection below picks all lambda pairs of parents at once and
+#   returns them as two arrays of indexes into population. The second parent
+#   of each pair is drawn from the rest of the population, so there is no
+#   asexual reproduction.
+def parentTourny(population, board, config):
+    rng = population.baseGenotype.rng
+    k = config["parentTournyK"]
+    parents1 = runTournaments(rng, population.scores, config["lambda"], k)
+    parents2 = runTournaments(rng, population.scores, config["lambda"], k, skipped=parents1)
+    return parents1, parents2
+
+# Returns the winners of rows tournaments of k distinct contestants each. If
+#   skipped is given, tournament row is held without the index skipped[row].
+def runTournaments(rng, scores, rows, k, skipped=None):
+    if skipped is None:
+        contestants = drawDistinct(rng, len(scores), rows, k)
+    else:
+        # Drawn out of one fewer and moved up past the skipped index.
+        contestants = drawDistinct(rng, len(scores) - 1, rows, k)
+        contestants += contestants >= skipped[:, None]
+    return contestants[np.arange(rows), np.argmax(scores[contestants], axis=1)]
+
+# Returns a rows by k array where each row holds k distinct integers in [0, n).
+def drawDistinct(rng, n, rows, k):
+    if k > n:
+        raise ValueError("Sample larger than population or is negative")
+
+    # Rows with a repeat are drawn again. When that would happen too often,
+    #   each row is the first k of a random ordering instead.
+    if k * k > n:
+        return np.argsort(rng.random((rows, n)), axis=1)[:, :k]
+    draws = rng.integers(n, size=(rows, k))
+    repeats = hasRepeats(draws)
+    while repeats.any():
+        draws[repeats] = rng.integers(n, size=(int(repeats.sum()), k))
+        repeats = hasRepeats(draws)
+    return draws
+
+def hasRepeats(draws):
+    ordered = np.sort(draws, axis=1)
+    return (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+
+def parentFitnessProp(population, board, config):
+    rng = population.baseGenotype.rng
+    weights = population.scores
 
     # The minScore ensures that all weights are at least 1e-99. This
     #   now allows for negative fitnesses. Each weight gets the minScore
     #   value (either negative or zero) subtracted from it so that each weight
     #   goes up proportionally.
-    weights = [weight - minScore + 1e-99 for weight in weights]
-
-    for i in range(config["lambda"]):
-        pick1 = random.choices(population, weights=weights, k=1)
-        pick1 = pick1[0]
-
-        # This is done to ensure that there is no asexual breeding.
-        # It sets the weight of the chosen parent to zero, while also
-        #   saving the initial weight in a temp variable.
-        index = population.index(pick1)
-        temp = weights[index]
-        weights[index] = 0
-
-        pick2 = random.choices(population, weights=weights, k=1)
-        pick2 = pick2[0]
-
-        # Resets the 1st parent's weight back to its initial value
-        weights[index] = temp
-
-        # Offspring creation happens here by adding the two parents.
-        # This uses a custom addition operator of the IndividualGenotype class
-        #   in order to recombine the parernts and mutate the child.
-        baby = pick1 + pick2
-        offspring.append(baby)
-
-def parentUniform(population, board, config, offspring):
-    for i in range(config["lambda"]):
-        parent1 = random.choice(population)
-        population.remove(parent1) # Remove temporarily to avoid asexual reproduction.
-
-        parent2 = random.choice(population)
-        population.append(parent1) # Add back the first parent.
-
-        # Offspring creation happens here by adding the two parents.
-        # This uses a custom addition operator of the IndividualGenotype class
-        #   in order to recombine the parernts and mutate the child.
-        baby = parent1 + parent2
-        offspring.append(baby)
+    weights = weights - min(weights.min(), 0) + 1e-99
+    cumWeights = np.cumsum(weights)
+
+    parents1 = drawProportional(rng, cumWeights, config["lambda"])
+
+    # Second parents that came out the same as the first are drawn again. The
+    #   few left after that, which only happens when one weight dwarfs the rest,
+    #   are drawn with the first parent's weight set to zero.
+    parents2 = drawProportional(rng, cumWeights, config["lambda"])
+    for _ in range(RESAMPLE_ROUNDS):
+        same = np.flatnonzero(parents1 == parents2)
+        if len(same) == 0:
+            break
+        parents2[same] = drawProportional(rng, cumWeights, len(same))
+    for i in np.flatnonzero(parents1 == parents2):
+        otherWeights = weights.copy()
+        otherWeights[parents1[i]] = 0
+        parents2[i] = drawProportional(rng, np.cumsum(otherWeights), 1)[0]
+
+    return parents1, parents2
+
+# Draws count indexes with chances in proportion to the weights whose running
+#   total is cumWeights, by binary search.
+def drawProportional(rng, cumWeights, count):
+    picks = np.searchsorted(cumWeights, rng.random(count) * cumWeights[-1], side="right")
+    return np.minimum(picks, len(cumWeights) - 1)
+
+def parentUniform(population, board, config):
+    rng = population.baseGenotype.rng
+    parents1 = rng.integers(len(population), size=config["lambda"])
+    parents2 = rng.integers(len(population) - 1, size=config["lambda"])
+    parents2 += parents2 >= parents1
+    return parents1, parents2
@@ -0,0 +1,104 @@
+from bisect import bisect_right
+from .moeaOps import Staircase
+
+"""
+Hypervolume of sets of moea tuples, used to compare fronts of the MOEA when
+    useHypervolume is in the config file. The hypervolume of a set of points
+    is the volume of the space they dominate that also dominates the
+    reference point. All three objectives are in (0, 1], so the reference
+    point is the origin and the largest possible hypervolume is 1.
+"""
+REFERENCE_POINT = (0, 0, 0)
+
+# Two volumes closer than this are treated as equal, since the same volume
+#   summed in a different order can pick up a little floating point error.
+VOLUME_TOLERANCE = 1e-12
+
+# Returns the hypervolume of a list of moea tuples.
+#
+# The points are swept from greatest to least first objective. The area the
+#   points seen so far dominate in the other two objectives is kept by an
+#   AreaStaircase, and each slab between two first objectives adds that area
+#   times its thickness.
+def getVolume(points, reference=REFERENCE_POINT):
+    points = sorted(points, reverse=True)
+    staircase = AreaStaircase(reference[1], reference[2])
+
+    volume = 0
+    for i in range(len(points)):
+        staircase.add(points[i][1], points[i][2])
+        if i + 1 < len(points):
+            nextFirst = points[i + 1][0]
+        else:
+            nextFirst = reference[0]
+        volume += staircase.area * (points[i][0] - nextFirst)
+    return volume
+
+# Returns the hypervolume of the moea tuples of a level of individuals.
+def getLevelVolume(level, reference=REFERENCE_POINT):
+    return getVolume(set(ind.moea for ind in level), reference)
+
+"""
+A Staircase (see moeaOps) that also keeps the area it dominates above the
+    reference values of the second and third objectives.
+"""
+class AreaStaircase(Staircase):
+    def __init__(self, secondRef, thirdRef):
+        super().__init__()
+        self.secondRef = secondRef
+        self.thirdRef = thirdRef
+        self.area = 0
+
+    def add(self, second, third):
+        if self.covers(second, third):
+            return
+
+        # Same slice as Staircase.add. The area of the points in it and of the
+        #   point right after it is taken away, then added back once replaced.
+        end = bisect_right(self.seconds, second)
+        start = end
+        while start > 0 and self.thirds[start - 1] <= third:
+            start -= 1
+        self.area -= self.getRangeArea(start, end + 1)
+        self.seconds[start:end] = [second]
+        self.thirds[start:end] = [third]
+        self.area += self.getRangeArea(start, start + 2)
+
+    # The area covered only by the points start up to stop, counting each
+    #   point's strip from the point before it.
+    def getRangeArea(self, start, stop):
+        area = 0
+        if start > 0:
+            prevSecond = self.seconds[start - 1]
+        else:
+            prevSecond = self.secondRef
+        for i in range(start, min(stop, len(self.seconds))):
+            area += (self.seconds[i] - prevSecond) * (self.thirds[i] - self.thirdRef)
+            prevSecond = self.seconds[i]
+        return area
+
+"""
+The class HypervolumeFront keeps the hypervolume of the moea tuples of the
+    current top level. update measures them again with getVolume, but only
+    if they changed since the last update, which on most generations they
+    have not once the top level settles.
+
+counts: The number of individuals with each moea tuple.
+volume: The hypervolume of the tuples in counts.
+"""
+class HypervolumeFront:
+    def __init__(self, reference=REFERENCE_POINT):
+        self.reference = reference
+        self.counts = {}
+        self.volume = 0
+
+    # Makes the front hold exactly the moea tuples of level, a list of
+    #   individuals.
+    def update(self, level):
+        newCounts = {}
+        for ind in level:
+            newCounts[ind.moea] = newCounts.get(ind.moea, 0) + 1
+
+        if newCounts.keys() != self.counts.keys():
+            self.volume = getVolume(newCounts, self.reference)
+        self.counts = newCounts
@@ -1,88 +1,60 @@
 from .solutionBoard import SolutionBoard
-import random
+import numpy as np
 
 """
-Class for each individual in a population. It goes ahead and generates the
-    solution at time of creation. The brandNew flag indicates whether the
-    individual is being created at the very start of a run or if it is the
-    product of two parent individuals.
+Class for an individual that is reported at the end of a run, such as the best
+    of a run or one on the MOEA's top level. While a run goes, individuals are
+    only rows of a Population (see population.py).
 
-genotype: A list of form [[bool, (x,y)], [bool, (x,y)], ...] where the bool
-            indicates whether a light should be placed on the white space
-            at coordinate (x,y).
+genotype: A numpy uint8 array with one bit per gene, packed eight to a byte
+            (see np.packbits). Bit i says whether a light should be placed on
+            the white space at baseGenotype.cells[i].
+
+The score (or moea) is set through setEvaluation by whoever makes the
+    individual. The SolutionBoard is only built if sol is asked for.
 """
 class IndividualGenotype:
-    def __init__(self, baseGenotype, board, config, brandNew):
-        self.genotype = [gene[:] for gene in baseGenotype.genotype]
+    def __init__(self, baseGenotype, board, config, genotype):
+        self.genotype = genotype
         self.alwaysLightCells = baseGenotype.alwaysLightCells
 
-        # These are saved so that they can be used later in offspring creation
+        # These are saved so that the SolutionBoard can be made later.
         self.baseGenotype = baseGenotype
         self.board = board
         self.config = config
 
-        # Only create a new sequence and evaluate it if the individual comes
-        #   without any parents.
-        if brandNew:
-            self.randomizeGenes()
-            self.sol = self.generateSol(board, config)
-            if "MOEA" == config["searchAlgorithm"]:
-                self.moea = self.sol.moea
-            else:
-                self.score = self.sol.score
+        self._sol = None
+
+        if baseGenotype.profiler is not None:
+            baseGenotype.profiler.count("individuals")
 
-    # Chooses a random number of lights to place and places them in random spots.
-    def randomizeGenes(self):
-        numOfLights = random.randrange(len(self.genotype)) + 1
-        lightPositions = random.sample(self.genotype, k=numOfLights)
-        for gene in lightPositions:
-            gene[0] = True
+    # Returns the genotype unpacked into one bool per gene.
+    @property
+    def lights(self):
+        return np.unpackbits(self.genotype, count=self.baseGenotype.numOfGenes).astype('bool')
+
+    # Stores the result of evaluating this individual.
+    def setEvaluation(self, value):
+        if "MOEA" == self.config["searchAlgorithm"]:
+            self.moea = value
+        else:
+            self.score = value
+
+    # The SolutionBoard that goes along with the evaluated genotype.
+    @property
+    def sol(self):
+        if self._sol is None:
+            self._sol = self.generateSol(self.board, self.config)
+        return self._sol
 
     # Generates the SolutionBoard that goes along with the genotype.
     def generateSol(self, board, config):
         cellLights = [light[:] for light in self.alwaysLightCells]
-        for isLight, cell in self.genotype:
-            if isLight:
-                cellLights.append(cell)
+        for x, y in self.baseGenotype.cells[self.lights]:
+            cellLights.append((x, y))
 
         sol = SolutionBoard(board, config, cellLights)
         return sol
 
-    """
-    This overwrites the "IndividualGenotype + IndividualGenotype" to form
-        an offspring of type IndividualGenotype from two parents.
-    self is parent 1, and other is parent 2.
-
-    This is where recombination and mutation take place.
-    """
-    def __add__(self, other):
-        # Below creates a brand new IndividualGenotype without evaluating it yet.
-        baby = IndividualGenotype(self.baseGenotype, self.board, self.config, brandNew=False)
-
-        newGenotype = []
-        for i in range(len(self.genotype)):
-            # Here the combination of genes happens, with there being a 50/50 chance
-            #   of which parent the child inherits the gene from.
-            whichGene = random.randint(1, 2)
-            if whichGene == 1:
-                newGene = self.genotype[i]
-            else:
-                newGene = other.genotype[i]
-            # Mutation happens below. Currently, about 1 gene per generation is mutated.
-            shouldMutate = random.randint(1, self.config["mutationRate"])
-            if shouldMutate == 1:
-                newGene[0] = not newGene[0]
-            newGenotype.append(newGene)
-
-        # Sets the new genotype and evaluates it.
-        baby.genotype = newGenotype
-        baby.sol = baby.generateSol(self.board, self.config)
-        if "MOEA" == self.config["searchAlgorithm"]:
-            baby.moea = baby.sol.moea
-        else:
-            baby.score = baby.sol.score
-
-        return baby
-
     def __str__(self):
         return str(self.moea)
@@ -0,0 +1,353 @@
+import math
+import time
+import numpy as np
+from multiprocessing import Pipe, Process
+from .population import getRandomPopulation, getPopulationFromArrays, getPopulationOf
+from .genotypeOps import getTopIndexes
+from .runPool import getRunSeed
+from .logWriter import RunLog
+from .moeaOps import getLevels, compareDomination
+from .hypervolume import HypervolumeFront, getVolume, getLevelVolume, VOLUME_TOLERANCE
+from . import randomEA, randomMOEA
+
+"""
+The island model of the EA and MOEA, used for a run when islands is in the
+    config file. The run is split over that many islands, each with its own
+    population of mu and its own process, so they evolve side by side. Every
+    migrationInterval generations each island sends copies of its migrants
+    best individuals to the islands next to it, where they take the place
+    of the worst ones. With migrationTopology "ring" island i sends to
+    island i + 1 and the last to the first, and with "full" every island
+    sends to every other.
+
+The islands are run by the process of the run, which talks to each one over a
+    pipe. It tells every island how many generations to run, waits for all
+    of them, and hands the migrants around before the next ones, so the
+    islands stay in step and a run only depends on its seed. Island i of a
+    run is seeded from the run's seed and i. The island processes are not
+    daemons, so each one can have its own pool for evalWorkers.
+
+numOfFitnessEvals is the budget of the whole run, so each generation counts
+    lambda evaluations for every island, plus the flips of its local search,
+    and the last stretch is cut short so the run ends at the same generation
+    it would without migration. The log gets one row per generation for the
+    whole run, with the averages over every island and the bests of the
+    best island. For the MOEA with useHypervolume the last column is the
+    hypervolume of the top levels of all the islands together.
+
+A generation counts as a change for noChangeForNEvals if the best of any
+    island got better in it. It is only checked when the islands stop to
+    migrate, so a run can go on for up to migrationInterval generations past
+    it. The best of the run is the best of the islands' bests, picked the
+    same way as the best of all runs. Island runs do not make checkpoints.
+"""
+DEFAULT_MIGRATION_INTERVAL = 10
+DEFAULT_MIGRANTS = 1
+# How long an island is given to stop on its own when the run ends early.
+ISLAND_STOP_SECONDS = 5
+
+# Does run runIndex of the EA or MOEA on islands. Returns the same results as
+#   seededRunEA or seededRunMOEA.
+def runIslands(runIndex, board, config, baseGenotype, usedSeed, logWriter):
+    start = time.perf_counter()
+    runLog = RunLog(logWriter, config.get("telemetry", False))
+    runLog.write("Run " + str(runIndex + 1) + '\n')
+
+    runSeed = getRunSeed(usedSeed, runIndex)
+    numOfIslands = config["islands"]
+    interval = config.get("migrationInterval", DEFAULT_MIGRATION_INTERVAL)
+    evalsPerGeneration = config["lambda"] * numOfIslands
+
+    connections = []
+    processes = []
+    try:
+        for island in range(numOfIslands):
+            connection, islandConnection = Pipe()
+            process = Process(target=runIsland, args=(islandConnection, board, config, baseGenotype,
+                                                      getIslandSeed(runSeed, island)))
+            process.start()
+            islandConnection.close()
+            connections.append(connection)
+            processes.append(process)
+
+        numOfFitnessEvals = config["mu"] * numOfIslands
+        runLog.writeRow(getRow(config, numOfFitnessEvals, [connection.recv() for connection in connections]))
+
+        generation = 0
+        migrants = [[] for _ in range(numOfIslands)]
+        while numOfFitnessEvals < config["numOfFitnessEvals"]:
+            left = math.ceil((config["numOfFitnessEvals"] - numOfFitnessEvals) / evalsPerGeneration)
+            numOfGenerations = min(interval, left)
+            for connection, islandMigrants in zip(connections, migrants):
+                connection.send((numOfGenerations, islandMigrants))
+            results = [connection.recv() for connection in connections]
+            generation += numOfGenerations
+
+            migrants = getRoutes(config, [result[3] for result in results])
+            epochEvals = 0
+            for i in range(numOfGenerations):
+                evals = sum(result[1][i] for result in results)
+                numOfFitnessEvals += evals
+                epochEvals += evals
+                runLog.writeRow(getRow(config, numOfFitnessEvals, [result[0][i] for result in results]))
+            # The local search can use a different number of evaluations
+            #   every generation, so the next stretch is planned from this one.
+            evalsPerGeneration = epochEvals / numOfGenerations
+
+            lastChange = max(result[2] for result in results)
+            evalsWithoutChange = (generation - lastChange) * evalsPerGeneration
+            if "noChangeForNEvals" in config and evalsWithoutChange >= config["noChangeForNEvals"]:
+                break
+
+        for connection in connections:
+            connection.send((0, []))
+        results = [connection.recv() for connection in connections]
+        for process in processes:
+            process.join()
+    finally:
+        # Closing the pipes stops any island still waiting for work, which
+        #   then ends its run with endRun. Only an island that is still
+        #   busy after that is terminated.
+        for connection in connections:
+            connection.close()
+        for process in processes:
+            process.join(ISLAND_STOP_SECONDS)
+            if process.is_alive():
+                process.terminate()
+
+    bests = [getPopulationFromArrays(baseGenotype, board, config, result[0]) for result in results]
+    bests = [best.getIndividuals(range(len(best))) for best in bests]
+    if "MOEA" == config["searchAlgorithm"]:
+        runResult = getBestLevel(config, bests)
+    else:
+        runResult = getBestIndividual([best[0] for best in bests])
+
+    cacheCounts = None
+    if results[0][1] is not None:
+        cacheCounts = (sum(result[1][0] for result in results), sum(result[1][1] for result in results))
+    if results[0][2] is not None:
+        runLog.profile = mergeProfiles([result[2] for result in results], time.perf_counter() - start)
+    return runLog, runResult, cacheCounts
+
+def getIslandSeed(runSeed, island):
+    return int(np.random.SeedSequence([runSeed, island]).generate_state(1)[0])
+
+# Returns the migrants each island gets, given the migrants each one sends.
+def getRoutes(config, sent):
+    numOfIslands = len(sent)
+    if config.get("migrationTopology", "ring") == "full":
+        return [[sent[j] for j in range(numOfIslands) if j != i] for i in range(numOfIslands)]
+    return [[sent[i - 1]] for i in range(numOfIslands)]
+
+# Returns the log row of one generation of the run from the islands' rows.
+#   Every island has mu individuals, so the average of the run is the average
+#   of the islands' averages.
+def getRow(config, numOfFitnessEvals, islandRows):
+    if "MOEA" != config["searchAlgorithm"]:
+        return (numOfFitnessEvals, float(np.mean([row[0] for row in islandRows])),
+                max(row[1] for row in islandRows))
+
+    row = (numOfFitnessEvals,)
+    for i in range(3):
+        row += (float(np.mean([islandRow[2 * i] for islandRow in islandRows])),
+                max(islandRow[2 * i + 1] for islandRow in islandRows))
+    if config.get("useHypervolume", False):
+        # Points dominated by another island's add nothing to the volume.
+        row += (getVolume(set().union(*[islandRow[6] for islandRow in islandRows])),)
+    return row
+
+# The first individual with the best score.
+def getBestIndividual(individuals):
+    best = individuals[0]
+    for individual in individuals[1:]:
+        if individual.score > best.score:
+            best = individual
+    return best
+
+# The best of the levels, compared the same way as the best of all runs.
+def getBestLevel(config, levels):
+    bestLevel = levels[0]
+    bestVolume = getLevelVolume(bestLevel)
+    for level in levels[1:]:
+        if config.get("useHypervolume", False):
+            volume = getLevelVolume(level)
+            if volume > bestVolume + VOLUME_TOLERANCE:
+                bestLevel = level
+                bestVolume = volume
+        else:
+            bestLevel, _ = compareDomination(bestLevel, level)
+    return bestLevel
+
+# The profiles of the islands as one, over the seconds of the whole run.
+def mergeProfiles(profiles, seconds):
+    counts = {counter: sum(profile["counts"][counter] for profile in profiles)
+              for counter in profiles[0]["counts"]}
+    return {"seconds": seconds, "counts": counts,
+            "times": np.vstack([profile["times"] for profile in profiles])}
+
+"""
+The loop of an island's process. The island sends the row of its first
+    population, then for every (numOfGenerations, migrants) it is sent it
+    takes in the migrants, runs that many generations and sends back
+    (rows, the evaluations of each generation, lastChange, its own
+    migrants). Once numOfGenerations is 0 it sends back (its best as arrays,
+    its cache hits and misses, its profile) and ends. It also ends if the
+    run closes its end of the pipe.
+"""
+def runIsland(connection, board, config, baseGenotype, islandSeed):
+    baseGenotype.startRun(islandSeed, config)
+    try:
+        if "MOEA" == config["searchAlgorithm"]:
+            island = MOEAIsland(board, config, baseGenotype)
+        else:
+            island = EAIsland(board, config, baseGenotype)
+        connection.send(island.row)
+
+        while True:
+            try:
+                numOfGenerations, migrants = connection.recv()
+            except EOFError:
+                # The run ended early and closed its end of the pipe.
+                return
+            if numOfGenerations == 0:
+                break
+            for arrays in migrants:
+                island.takeMigrants(getPopulationFromArrays(baseGenotype, board, config, arrays))
+            rows = []
+            evals = []
+            for _ in range(numOfGenerations):
+                rows.append(island.runGeneration())
+                evals.append(config["lambda"] + baseGenotype.takeExtraEvals())
+            connection.send((rows, evals, island.lastChange, island.getMigrants().getArrays()))
+
+        cacheCounts = None
+        if baseGenotype.evalCache is not None:
+            cacheCounts = (baseGenotype.evalCache.hits, baseGenotype.evalCache.misses)
+        profile = None
+        if baseGenotype.profiler is not None:
+            profile = baseGenotype.profiler.getRun(baseGenotype.evalCache)
+        connection.send((getPopulationOf(baseGenotype, board, config, island.getBest()).getArrays(),
+                         cacheCounts, profile))
+    finally:
+        baseGenotype.endRun()
+        connection.close()
+
+"""
+The class EAIsland holds the population of one island of the EA and its best
+    individual so far. lastChange is the generation its best last got better,
+    counting the first population as generation 0.
+"""
+class EAIsland:
+    def __init__(self, board, config, baseGenotype):
+        self.board = board
+        self.config = config
+        self.baseGenotype = baseGenotype
+
+        self.population = getRandomPopulation(baseGenotype, board, config, config["mu"])
+        self.population.evaluate()
+        avgScore, bestScore, self.best = randomEA.evalPopulation(self.population)
+        self.row = (avgScore, bestScore)
+        self.generation = 0
+        self.lastChange = 0
+
+    # Runs one generation and returns its row.
+    def runGeneration(self):
+        profiler = self.baseGenotype.profiler
+        if profiler is not None:
+            profiler.startGeneration()
+        self.population = randomEA.evolve(self.board, self.config, self.population)
+        self.generation += 1
+        avgScore, bestScore, bestIndividual = randomEA.evalPopulation(self.population)
+        if profiler is not None:
+            profiler.lap("evalPopulation")
+        if bestScore > self.best.score:
+            self.best = bestIndividual
+            self.lastChange = self.generation
+        if profiler is not None:
+            profiler.endGeneration()
+        return avgScore, bestScore
+
+    # Returns a Population of copies of the best individuals to send away.
+    def getMigrants(self):
+        numOfMigrants = self.config.get("migrants", DEFAULT_MIGRANTS)
+        return self.population.take(getTopIndexes(self.population.scores, numOfMigrants))
+
+    # Puts the migrants in the place of the worst individuals.
+    def takeMigrants(self, migrants):
+        worst = getTopIndexes(-self.population.scores, len(migrants))
+        kept = np.setdiff1d(np.arange(len(self.population)), worst)
+        self.population = self.population.take(kept).concat(migrants)
+
+    def getBest(self):
+        return [self.best]
+
+"""
+The class MOEAIsland holds the population of one island of the MOEA and its
+    best top level so far, kept the same way as in singleRunMOEA. Its rows
+    are those of randomMOEA.evalPopulation, followed by the moea tuples of
+    its top level if useHypervolume is on.
+"""
+class MOEAIsland(EAIsland):
+    def __init__(self, board, config, baseGenotype):
+        self.board = board
+        self.config = config
+        self.baseGenotype = baseGenotype
+        self.useHypervolume = config.get("useHypervolume", False)
+
+        self.population = getRandomPopulation(baseGenotype, board, config, config["mu"])
+        self.population.evaluate()
+        levels = getLevels(self.population)
+        topLevel = self.population.getIndividuals(levels[0])
+
+        self.front = HypervolumeFront()
+        if self.useHypervolume:
+            self.front.update(topLevel)
+        self.bestTopLevel = topLevel
+        self.bestVolume = self.front.volume
+        self.row = self.getRow()
+        self.generation = 0
+        self.lastChange = 0
+
+    def runGeneration(self):
+        profiler = self.baseGenotype.profiler
+        if profiler is not None:
+            profiler.startGeneration()
+        self.population, levels = randomMOEA.evolve(self.board, self.config, self.population)
+        self.generation += 1
+        topLevel = self.population.getIndividuals(levels[0])
+        if profiler is not None:
+            profiler.lap("getLevels")
+
+        if self.useHypervolume:
+            self.front.update(topLevel)
+            if profiler is not None:
+                profiler.lap("hypervolume")
+            stayedSame = self.front.volume <= self.bestVolume + VOLUME_TOLERANCE
+            if not stayedSame:
+                self.bestTopLevel = topLevel
+                self.bestVolume = self.front.volume
+        else:
+            self.bestTopLevel, stayedSame = compareDomination(self.bestTopLevel, topLevel)
+        if not stayedSame:
+            self.lastChange = self.generation
+
+        row = self.getRow()
+        if profiler is not None:
+            profiler.lap("evalPopulation")
+            profiler.endGeneration()
+        return row
+
+    def getRow(self):
+        row = randomMOEA.evalPopulation(self.population)
+        if self.useHypervolume:
+            row += (set(self.front.counts),)
+        return row
+
+    # The scores of the MOEA come from the levels, so they are found again
+    #   once the migrants are in.
+    def takeMigrants(self, migrants):
+        super().takeMigrants(migrants)
+        getLevels(self.population)
+
+    def getBest(self):
+        return self.bestTopLevel
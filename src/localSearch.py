@@ -0,0 +1,139 @@
+import math
+import numpy as np
+from .deltaEvaluator import DeltaEvaluator
+from .moeaOps import getLevels, dominates
+
+"""
+The memetic local search of the EA and MOEA, only used if localSearchFraction
+    is in the config file. After the offspring of a generation are scored,
+    the best localSearchFraction of them are improved by flipping one gene
+    at a time and keeping the first flip that makes the individual better.
+    Each kept flip is a step, and an individual takes up to localSearchSteps
+    steps, or fewer if no flip makes it better. A flip is kept for the MOEA if
+    the new moea tuple dominates the old one. The score of the EA only counts
+    lit cells (see batchEvaluator.getValue), so for the EA a flip is kept if
+    it neither lowers the score nor raises the violations (light violations
+    plus black cell violations), and makes one of them better. Every flip
+    tried counts as a fitness evaluation.
+
+Only the genes that might help are tried, in a random order. They are found
+    again after every step, since a kept flip changes which genes might help:
+
+    Cells that are not lit, which a bulb would light.
+    Bulbs that share a segment with another bulb.
+    Genes beside a numbered cell with the wrong number of bulbs, with
+        enforceBlackCellConstraint.
+
+Each flip is scored by a DeltaEvaluator, which only looks at the two segments
+    of the flipped cell, so no SolutionBoard is made for a trial.
+"""
+DEFAULT_LOCAL_SEARCH_STEPS = 20
+
+"""
+The class LocalSearch holds what the local search needs for a BaseGenotype.
+
+delta:     A DeltaEvaluator, set to the bulbs of each individual in turn.
+geneCells: The index in board.whiteCellArray of the cell of each gene.
+fixedCells: The indexes of the alwaysLightCells, which always hold a bulb.
+evals:     The flips tried since the last takeEvals.
+"""
+class LocalSearch:
+    def __init__(self, board, config, baseGenotype):
+        self.board = board
+        self.config = config
+        self.isMOEA = "MOEA" == config["searchAlgorithm"]
+        self.fraction = config["localSearchFraction"]
+        self.steps = config.get("localSearchSteps", DEFAULT_LOCAL_SEARCH_STEPS)
+
+        cells = baseGenotype.cells
+        self.geneCells = board.cellIndex[cells[:, 0], cells[:, 1]]
+        fixed = np.array(baseGenotype.alwaysLightCells, dtype='int').reshape(-1, 2)
+        self.fixedCells = board.cellIndex[fixed[:, 0], fixed[:, 1]]
+        self.delta = DeltaEvaluator.fromBulbs(board, config, self.fixedCells)
+        self.evals = 0
+
+    # Returns the flips tried since it was last asked, so they can be added
+    #   to numOfFitnessEvals.
+    def takeEvals(self):
+        evals = self.evals
+        self.evals = 0
+        return evals
+
+    # Improves the best rows of the scored offspring in place.
+    def improve(self, offspring, rng):
+        numToSearch = math.ceil(self.fraction * len(offspring))
+        if numToSearch <= 0:
+            return
+        if self.isMOEA:
+            # The scores of the MOEA come from the levels.
+            getLevels(offspring)
+        rows = np.argsort(-offspring.scores, kind='stable')[:numToSearch]
+
+        profiler = offspring.baseGenotype.profiler
+        for row in rows.tolist():
+            trials = self.improveRow(offspring, row, rng)
+            self.evals += trials
+            if profiler is not None:
+                profiler.count("localSearchTrials", trials)
+
+    # Runs the local search on one row and returns the number of flips tried.
+    def improveRow(self, offspring, row, rng):
+        delta = self.delta
+        genes = np.unpackbits(offspring.genotypes[row], count=len(self.geneCells)).view('bool')
+        delta.setBulbs(np.concatenate((self.fixedCells, self.geneCells[genes])))
+        value = self.getValue()
+
+        steps = 0
+        tried = 0
+        position = 0
+        candidates = rng.permutation(self.getCandidates(genes)).tolist()
+        while steps < self.steps and position < len(candidates):
+            gene = candidates[position]
+            position += 1
+            tried += 1
+            delta.flipIndex(self.geneCells[gene])
+            newValue = self.getValue()
+            if dominates(newValue, value):
+                genes[gene] = not genes[gene]
+                value = newValue
+                steps += 1
+                # The next step starts over on the genes that might help now.
+                if steps < self.steps:
+                    candidates = rng.permutation(self.getCandidates(genes)).tolist()
+                    position = 0
+            else:
+                delta.flipIndex(self.geneCells[gene])
+
+        if steps > 0:
+            offspring.genotypes[row] = np.packbits(genes)
+            if self.isMOEA:
+                offspring.moeas[row] = value
+            else:
+                offspring.scores[row] = value[0]
+        return tried
+
+    # Returns the genes worth flipping for the bulbs genes (see above).
+    def getCandidates(self, genes):
+        board = self.board
+        delta = self.delta
+        isCandidate = delta.illumination[self.geneCells] == 0
+
+        xCells = board.cellXSegment[self.geneCells]
+        yCells = board.cellYSegment[self.geneCells]
+        isCandidate |= genes & ((delta.xBulbs[xCells] > 1) | (delta.yBulbs[yCells] > 1))
+
+        if self.config["enforceBlackCellConstraint"]:
+            isWrong = delta.neighboringLights != board.numberedValues
+            isNextToWrong = np.zeros(board.whiteCount, dtype='bool')
+            isNextToWrong[board.adjWhite[isWrong[board.adjNumbered]]] = True
+            isCandidate |= isNextToWrong[self.geneCells]
+        return np.flatnonzero(isCandidate)
+
+    # Returns what a flip is judged by: the moea tuple for the MOEA, and
+    #   (score, -violations) for the EA. A flip is kept if the new one
+    #   dominates the old one.
+    def getValue(self):
+        value = self.delta.getValue()
+        if self.isMOEA:
+            return value
+        return value, -(self.delta.lightViolations + self.delta.blackCellViolations)
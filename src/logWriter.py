@@ -0,0 +1,117 @@
+import sys
+import time
+from .telemetry import TelemetryWriter
+from .profiler import ProfileWriter
+
+"""
+The class LogWriter writes a log or solution file as it is made instead of
+    keeping the whole text in memory. Text goes through a large file buffer
+    and is flushed to disk at every run boundary, so a crash only loses the
+    run that was going on.
+
+The log is also mirrored to stdout unless echoLog is false in the config file.
+    By default the mirror is written at every run boundary. With echoLogInterval
+    in the config file it is also written once that many seconds have passed.
+    A LogWriter made without a config, like the one for the solution file,
+    only mirrors if echo is True.
+
+If telemetry is true in the config file, the numeric rows of every run are
+    also saved to a binary sidecar next to the log (see telemetry). Likewise,
+    if profile is true the profile of every run is summed up in a JSON file
+    next to the log (see profiler).
+"""
+# Size in bytes of the buffer in front of the file.
+BUFFER_SIZE = 1 << 20
+
+class LogWriter:
+    def __init__(self, path, config=None, echo=False):
+        self.file = open(path, 'w', buffering=BUFFER_SIZE)
+
+        self.echo = echo
+        self.echoInterval = 0
+        if config is not None:
+            self.echo = config.get("echoLog", True)
+            self.echoInterval = config.get("echoLogInterval", 0)
+        self.pending = []
+        self.lastEcho = time.monotonic()
+
+        self.telemetry = None
+        if config is not None and config.get("telemetry", False):
+            self.telemetry = TelemetryWriter(path)
+        self.profile = None
+        if config is not None and config.get("profile", False):
+            self.profile = ProfileWriter(path)
+
+    def write(self, text):
+        self.file.write(text)
+        if self.echo:
+            self.pending.append(text)
+            if self.echoInterval > 0 and time.monotonic() - self.lastEcho >= self.echoInterval:
+                self.echoPending()
+
+    # Writes the rows of a finished RunLog that were not already written
+    #   through, and hands its numeric rows to the telemetry sidecar and its
+    #   profile to the profile file.
+    def writeRun(self, runLog):
+        self.write(runLog.getTxt())
+        if self.telemetry is not None:
+            self.telemetry.addRun(runLog.rows)
+        if self.profile is not None and runLog.profile is not None:
+            self.profile.addRun(runLog.profile)
+
+    # Called at the end of every run.
+    def flush(self):
+        self.file.flush()
+        if self.echo:
+            self.echoPending()
+
+    def echoPending(self):
+        sys.stdout.write("".join(self.pending))
+        sys.stdout.flush()
+        self.pending = []
+        self.lastEcho = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.profile is not None:
+            self.profile.close()
+        # Ends the mirrored text with a newline, the way print did.
+        if self.echo:
+            print()
+
+"""
+The class RunLog collects the log rows of one run. Given a writer, the rows
+    go straight through to it as they are made. Without one, as in a worker
+    process, they are kept in a list and joined once by getTxt so the parent
+    process can write them in run order.
+
+With keepRows, the numbers of each row written with writeRow are also kept
+    in rows for the telemetry sidecar. profile is set by the EA and MOEA to
+    the run's PhaseProfiler.getRun if profile is true in the config file.
+"""
+class RunLog:
+    def __init__(self, writer=None, keepRows=False):
+        self.writer = writer
+        self.parts = []
+        self.keepRows = keepRows
+        self.rows = []
+        self.profile = None
+
+    def write(self, text):
+        if self.writer is not None:
+            self.writer.write(text)
+        else:
+            self.parts.append(text)
+
+    # Writes values as one tab separated log row.
+    def writeRow(self, values):
+        self.write("\t".join(str(value) for value in values) + "\n")
+        if self.keepRows:
+            self.rows.append(values)
+
+    # Returns the rows that were not already written through.
+    def getTxt(self):
+        return "".join(self.parts)
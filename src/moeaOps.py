@@ -1,3 +1,5 @@
+from bisect import bisect_left, bisect_right
+import numpy as np
 
 # Returns the more dominant of a vs. b.
 #   Also returns True if a is more dominant.
@@ -20,20 +22,76 @@ def compareDomination(a, b):
         return b, False
 
 # Returns a list of lists, representing the levels of domination where
-#   levels[0] is the most dominant. Each individual item is a genotype.
+#   levels[0] is the most dominant. Each item is the index of a row of the
+#   Population, whose scores are set to 1/level.
+#
+# This is a sweep based non-dominated sort for the three moea objectives.
+#   The distinct moea tuples are visited from greatest to least, so anything
+#   that dominates a tuple has already been placed by the time it is reached.
+#   Each level keeps a Staircase of what it holds, and the level of a tuple is
+#   found by binary search, since a tuple dominated by something on one level
+#   is also dominated by something on every level above it.
 def getLevels(population):
-    levels = []
-    for ind in population:
-        insert(levels, 0, ind) # Always try to insert each genotype at the top.
+    moeas = population.getMoeaTuples()
 
-    for i in range(len(levels)):
-        curLevel = i + 1
-        for ind in levels[i]:
-            # Fitness is 1/level so that higher fitness means more dominant.
-            ind.score = 1 / curLevel
+    staircases = []
+    levelOf = {}
+    for moea in sorted(set(moeas), reverse=True):
+        low = 0
+        high = len(staircases)
+        while low < high:
+            mid = (low + high) // 2
+            if staircases[mid].covers(moea[1], moea[2]):
+                low = mid + 1
+            else:
+                high = mid
+        if low == len(staircases):
+            staircases.append(Staircase())
+        staircases[low].add(moea[1], moea[2])
+        levelOf[moea] = low
+
+    levels = [[] for _ in staircases]
+    rowLevels = [levelOf[moea] for moea in moeas]
+    for row, curLevel in enumerate(rowLevels):
+        levels[curLevel].append(row)
+
+    # Fitness is 1/level so that higher fitness means more dominant.
+    population.scores = 1 / (np.array(rowLevels, dtype='float') + 1)
 
     return levels
 
+"""
+A Staircase holds the points (second, third) of the moea tuples placed on one
+    level, keeping only the ones not covered by another. They are kept sorted
+    by second objective going up, which puts the third objective going down.
+
+A point is covered if some kept point is at least as big in both objectives.
+    Every tuple already placed is at least as big in the first objective as the
+    one being placed and differs from it, so being covered means being dominated.
+"""
+class Staircase:
+    def __init__(self):
+        self.seconds = []
+        self.thirds = []
+
+    # Returns True if a kept point is at least as big as (second, third) in both.
+    def covers(self, second, third):
+        i = bisect_left(self.seconds, second)
+        return i < len(self.seconds) and self.thirds[i] >= third
+
+    def add(self, second, third):
+        if self.covers(second, third):
+            return
+
+        # Drops the kept points that the new one covers. They sit just before
+        #   where it goes, along with any point with the same second objective.
+        end = bisect_right(self.seconds, second)
+        start = end
+        while start > 0 and self.thirds[start - 1] <= third:
+            start -= 1
+        self.seconds[start:end] = [second]
+        self.thirds[start:end] = [third]
+
 # Returns True if and only if A dominates B.
 def dominates(a, b):
     flag = False
@@ -43,26 +101,3 @@ def dominates(a, b):
         if a[i] > b[i]:
             flag = True
     return flag
-
-# This function inserts a new genotype into the levels based on domination.
-#   It also kicks out genotypes that it dominates into the next level.
-def insert(levels, i, cur):
-    if i == len(levels):
-        levels.append([cur])
-        return
-
-    addFlag = True
-    toRemoveFromLevel = [] # Items to later be removed, once all iteration is done.
-    for ind in levels[i]:
-        if dominates(cur.moea, ind.moea):
-            insert(levels, i+1, ind) # This kicks the dominated ind to the next level.
-            toRemoveFromLevel.append(ind)
-        elif dominates(ind.moea, cur.moea):
-            insert(levels, i+1, cur) # cur was dominated so it moves to the next level.
-            addFlag = False
-            break
-
-    if addFlag:
-        levels[i].append(cur)
-    for ind in toRemoveFromLevel:
-        levels[i].remove(ind)
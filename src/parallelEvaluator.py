@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from .board import Board
+from .batchEvaluator import BatchEvaluator, unpackGenes
+
+"""
+The class ParallelEvaluator spreads the evaluation of each generation's
+    offspring over a pool of processes. It is only made if evalWorkers is in
+    the config file.
+
+The board array and the gene coordinates of the BaseGenotype are copied once
+    into shared memory. Each worker builds its own BatchEvaluator on top of
+    them when it starts, so after that only the packed genotypes are sent to
+    the workers and only the (litCount, lightViolations, blackCellViolations)
+    counts come back.
+
+The pool and shared memory are started on the first evaluation and kept until
+    close is called, which is done at the end of every run. A ParallelEvaluator
+    that is sent to another process arrives closed and starts its own pool.
+"""
+class ParallelEvaluator:
+    def __init__(self, board, config, baseGenotype):
+        self.board = board
+        self.config = config
+        self.baseGenotype = baseGenotype
+        self.numOfWorkers = config["evalWorkers"]
+
+        self.pool = None
+        self.sharedBlocks = []
+
+    # The pool and shared memory belong to the process that started them.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["pool"] = None
+        state["sharedBlocks"] = []
+        return state
+
+    def start(self):
+        boardBlock = self.share(self.board.board)
+        cellsBlock = self.share(self.baseGenotype.cells)
+        initArgs = (boardBlock.name, self.board.board.shape, self.board.board.dtype.str,
+                    cellsBlock.name, self.baseGenotype.cells.shape, self.baseGenotype.cells.dtype.str,
+                    self.config, self.baseGenotype.alwaysLightCells)
+        self.pool = ProcessPoolExecutor(max_workers=self.numOfWorkers,
+                                        initializer=initEvalWorker, initargs=initArgs)
+
+    # Copies array into a new block of shared memory and returns the block.
+    def share(self, array):
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        sharedArray = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        sharedArray[...] = array
+        self.sharedBlocks.append(block)
+        return block
+
+    # Returns the lit counts, light violations and black cell violations of
+    #   every row of a (population x bytes) matrix of packed genotypes.
+    def evaluatePacked(self, packed):
+        if self.pool is None:
+            self.start()
+
+        # Each worker gets one chunk of rows, so at most one task per worker.
+        numOfChunks = min(self.numOfWorkers, len(packed))
+        futures = [self.pool.submit(evaluateChunk, chunk.tobytes(), len(chunk))
+                   for chunk in np.array_split(packed, numOfChunks)]
+
+        counts = [[], [], []]
+        for future in futures:
+            for i, chunkCounts in enumerate(future.result()):
+                counts[i] += chunkCounts
+        return tuple(np.array(count, dtype='int') for count in counts)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        for block in self.sharedBlocks:
+            block.close()
+            block.unlink()
+        self.sharedBlocks = []
+
+# The worker's shared memory blocks and the evaluator built on them.
+_workerBlocks = []
+_workerEvaluator = None
+
+def initEvalWorker(boardName, boardShape, boardType, cellsName, cellsShape, cellsType,
+                   config, alwaysLightCells):
+    global _workerEvaluator
+    boardBlock = shared_memory.SharedMemory(name=boardName)
+    cellsBlock = shared_memory.SharedMemory(name=cellsName)
+    _workerBlocks.extend([boardBlock, cellsBlock])
+
+    boardArray = np.ndarray(boardShape, dtype=boardType, buffer=boardBlock.buf)
+    cells = np.ndarray(cellsShape, dtype=cellsType, buffer=cellsBlock.buf)
+    _workerEvaluator = BatchEvaluator(Board.fromArray(boardArray), config, cells, alwaysLightCells)
+
+# Evaluates numOfRows packed genotypes sent as bytes. Returns the three
+#   counts as lists so that only plain numbers are sent back.
+def evaluateChunk(packedBytes, numOfRows):
+    packed = np.frombuffer(packedBytes, dtype='uint8').reshape(numOfRows, -1)
+    genes = unpackGenes(packed, _workerEvaluator.numOfGenes)
+    return tuple(count.tolist() for count in _workerEvaluator.evaluate(genes))
@@ -0,0 +1,144 @@
+import numpy as np
+from .individualGenotype import IndividualGenotype
+from .batchEvaluator import evaluateGenotypes
+
+"""
+The class Population holds every individual of a generation as rows of a few
+    arrays instead of as one IndividualGenotype each, so a population only
+    takes up the bytes of its genotypes and values.
+
+genotypes: A (size x numOfBytes) uint8 array with one packed genotype per row
+             (see IndividualGenotype).
+scores:    A float array with the score of each row. For the MOEA this is
+             1 / (level + 1), set by getLevels.
+moeas:     For the MOEA, a (size x 3) float array with the moea tuple of each
+             row. None otherwise.
+
+Rows are only turned into IndividualGenotypes, which build their SolutionBoard
+    when asked, for the individuals that are reported.
+"""
+class Population:
+    def __init__(self, baseGenotype, board, config, genotypes):
+        self.baseGenotype = baseGenotype
+        self.board = board
+        self.config = config
+        self.genotypes = genotypes
+        self.scores = None
+        self.moeas = None
+
+        # A Population of moea tuples alone, as in levelsBenchmark, has no BaseGenotype.
+        if baseGenotype is not None and baseGenotype.profiler is not None:
+            baseGenotype.profiler.count("populations")
+            baseGenotype.profiler.count("populationBytes", genotypes.nbytes)
+
+    def __len__(self):
+        return len(self.genotypes)
+
+    # Scores every row with one call to the evaluator of the BaseGenotype.
+    def evaluate(self):
+        if self.baseGenotype.profiler is not None:
+            self.baseGenotype.profiler.count("evaluations", len(self))
+        self.setEvaluations(evaluateGenotypes(self.baseGenotype, self.genotypes))
+
+    # Stores the scores (or moea tuples for the MOEA) of every row.
+    def setEvaluations(self, values):
+        if "MOEA" == self.config["searchAlgorithm"]:
+            self.moeas = np.array(values, dtype='float').reshape(-1, 3)
+            self.scores = np.zeros(len(values))
+        else:
+            self.scores = np.array(values, dtype='float')
+
+    # Returns a new Population of the rows at indexes, values included.
+    def take(self, indexes):
+        indexes = np.asarray(indexes, dtype='int')
+        population = Population(self.baseGenotype, self.board, self.config, self.genotypes[indexes])
+        population.scores = self.scores[indexes]
+        if self.moeas is not None:
+            population.moeas = self.moeas[indexes]
+        return population
+
+    # Returns a new Population of the rows of self followed by those of other.
+    def concat(self, other):
+        population = Population(self.baseGenotype, self.board, self.config,
+                                np.concatenate((self.genotypes, other.genotypes)))
+        population.scores = np.concatenate((self.scores, other.scores))
+        if self.moeas is not None:
+            population.moeas = np.concatenate((self.moeas, other.moeas))
+        return population
+
+    # Returns the moea tuples of every row as a list.
+    def getMoeaTuples(self):
+        return [tuple(moea) for moea in self.moeas.tolist()]
+
+    # Returns row index as an IndividualGenotype with its score or moea tuple.
+    def getIndividual(self, index):
+        individual = IndividualGenotype(self.baseGenotype, self.board, self.config,
+                                        self.genotypes[index].copy())
+        if self.moeas is None:
+            individual.setEvaluation(float(self.scores[index]))
+        else:
+            individual.setEvaluation(tuple(self.moeas[index].tolist()))
+            individual.score = float(self.scores[index])
+        return individual
+
+    def getIndividuals(self, indexes):
+        return [self.getIndividual(index) for index in indexes]
+
+    # Returns the arrays of the population, as saved in a checkpoint.
+    def getArrays(self):
+        return {"genotypes": self.genotypes, "scores": self.scores, "moeas": self.moeas}
+
+# Returns the Population of arrays from Population.getArrays.
+def getPopulationFromArrays(baseGenotype, board, config, arrays):
+    population = Population(baseGenotype, board, config, arrays["genotypes"])
+    population.scores = arrays["scores"]
+    population.moeas = arrays["moeas"]
+    return population
+
+# Returns a Population of the given evaluated IndividualGenotypes.
+def getPopulationOf(baseGenotype, board, config, individuals):
+    population = Population(baseGenotype, board, config,
+                            np.array([ind.genotype for ind in individuals], dtype='uint8'))
+    population.scores = np.array([ind.score for ind in individuals], dtype='float')
+    if "MOEA" == config["searchAlgorithm"]:
+        population.moeas = np.array([ind.moea for ind in individuals], dtype='float').reshape(-1, 3)
+    return population
+
+# Returns a Population of size unevaluated individuals, each with a random
+#   number of lights placed in random spots.
+def getRandomPopulation(baseGenotype, board, config, size):
+    rng = baseGenotype.rng
+    numOfGenes = baseGenotype.numOfGenes
+
+    lights = np.zeros((size, numOfGenes), dtype='bool')
+    for row in lights:
+        numOfLights = rng.integers(numOfGenes) + 1
+        row[rng.choice(numOfGenes, size=numOfLights, replace=False)] = True
+    return Population(baseGenotype, board, config, np.packbits(lights, axis=1))
+
+"""
+Returns a Population of unevaluated offspring, one for each pair of rows
+    (parents1[i], parents2[i]) of population.
+
+This is where recombination and mutation take place. Each bit of a random
+    mask picks which parent the child inherits that gene from, with a 50/50
+    chance. Each gene then has a 1 in mutationRate chance of being flipped,
+    so the number of flips of each child is drawn first and then their
+    positions.
+"""
+def makeOffspring(population, parents1, parents2):
+    baseGenotype = population.baseGenotype
+    rng = baseGenotype.rng
+    numOfGenes = baseGenotype.numOfGenes
+    genotypes = population.genotypes
+
+    masks = rng.integers(0, 256, size=(len(parents1), baseGenotype.numOfBytes), dtype='uint8')
+    children = (genotypes[parents1] & masks) | (genotypes[parents2] & ~masks)
+
+    numsOfMutations = rng.binomial(numOfGenes, 1 / population.config["mutationRate"],
+                                   size=len(parents1))
+    for i in np.flatnonzero(numsOfMutations):
+        positions = rng.choice(numOfGenes, size=numsOfMutations[i], replace=False)
+        np.bitwise_xor.at(children[i], positions >> 3, (128 >> (positions & 7)).astype('uint8'))
+
+    return Population(baseGenotype, population.board, population.config, children)
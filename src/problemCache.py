@@ -0,0 +1,94 @@
+import hashlib
+import io
+import os
+import shutil
+import numpy as np
+from .board import Board
+
+"""
+A cache of the work done on a problem file before a search starts, so running
+    the same problem again does not redo it. It is only used if
+    problemCacheDir is in the config file.
+
+Each problem file gets a folder in problemCacheDir named after a hash of its
+    text, so an edited problem file gets a new folder and two copies of the
+    same file share one. The folder holds one .npy file for each array of the
+    Board in BOARD_ARRAYS, which are memory-mapped when loaded instead of
+    being worked out again. The cells found by forceValidity are added as
+    forcedCells.npz the first time a config with validityForcedInit needs
+    them.
+
+The folder is written under a temporary name and then renamed, and
+    forcedCells.npz is written to a temporary file and then moved into
+    place, so a job that is stopped never leaves half a cache behind.
+    CACHE_VERSION is part of the hash, so it should be raised whenever what
+    is cached changes.
+"""
+CACHE_VERSION = 1
+
+# The arrays of a Board that are cached (see Board.buildSegmentIndex).
+BOARD_ARRAYS = ["board", "blackCellArray", "xSegmentOf", "ySegmentOf", "whiteCellArray", "cellIndex",
+                "cellXSegment", "cellYSegment", "xSegmentCells", "xSegmentStarts",
+                "ySegmentCells", "ySegmentStarts", "numberedCells", "numberedValues",
+                "adjWhite", "adjNumbered"]
+FORCED_CELLS_FILE = "forcedCells.npz"
+
+# Returns the Board of the problem file at probPath. It is loaded from the
+#   cache in cacheDir if it is there and saved to it if not. Without a
+#   cacheDir the file is always read.
+def loadBoard(probPath, cacheDir=None):
+    if cacheDir is None:
+        return Board(open(probPath, 'r'))
+
+    with open(probPath, 'r') as probFile:
+        wholeFile = probFile.read()
+    path = getCachePath(cacheDir, wholeFile)
+    if os.path.isdir(path):
+        board = Board.fromCache(wholeFile, {name: np.load(os.path.join(path, name + ".npy"), mmap_mode='c')
+                                            for name in BOARD_ARRAYS})
+    else:
+        board = Board(io.StringIO(wholeFile))
+        saveBoard(board, path)
+    board.cachePath = path
+    return board
+
+def getCachePath(cacheDir, wholeFile):
+    key = hashlib.sha256((str(CACHE_VERSION) + "\n" + wholeFile).encode()).hexdigest()
+    return os.path.join(cacheDir, key[:32])
+
+def saveBoard(board, path):
+    tempPath = path + ".tmp" + str(os.getpid())
+    os.makedirs(tempPath, exist_ok=True)
+    for name in BOARD_ARRAYS:
+        np.save(os.path.join(tempPath, name + ".npy"), getattr(board, name))
+    try:
+        os.rename(tempPath, path)
+    except OSError:
+        # Another job cached the same problem first.
+        shutil.rmtree(tempPath, ignore_errors=True)
+
+# Returns the (alwaysLightCells, neverLightCells) cached for board by
+#   saveForcedCells, or None if there are none.
+def loadForcedCells(board):
+    if board.cachePath is None:
+        return None
+    path = os.path.join(board.cachePath, FORCED_CELLS_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as forced:
+        return getCellList(forced["alwaysLightCells"]), getCellList(forced["neverLightCells"])
+
+def saveForcedCells(board, forcedCells):
+    if board.cachePath is None:
+        return
+    alwaysLightCells, neverLightCells = forcedCells
+    tempPath = os.path.join(board.cachePath, "forcedCells.tmp" + str(os.getpid()) + ".npz")
+    np.savez(tempPath, alwaysLightCells=getCellArray(alwaysLightCells),
+             neverLightCells=getCellArray(neverLightCells))
+    os.replace(tempPath, os.path.join(board.cachePath, FORCED_CELLS_FILE))
+
+def getCellArray(cells):
+    return np.array(cells, dtype='int64').reshape(-1, 2)
+
+def getCellList(cellArray):
+    return [tuple(cell) for cell in cellArray.tolist()]
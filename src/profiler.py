@@ -0,0 +1,132 @@
+import json
+import os
+import time
+import numpy as np
+
+"""
+The phase profiler times the parts of every generation of the EA and MOEA. It
+    is only on if profile is true in the config file. Each run then gets its
+    own PhaseProfiler as baseGenotype.profiler, and is None otherwise, so
+    when it is off the only cost is a few checks for None per generation.
+
+The summary of every run is written next to the log file with the same name
+    and a .profile.json extension (logs/d1Log.txt gives
+    logs/d1Log.profile.json). For each run and for all runs together it
+    holds the seconds, the evaluations per second, the counters below and,
+    for each phase, the total seconds, its share of the run and percentiles
+    of its seconds per generation.
+
+The phases, in the order they happen in a generation:
+
+    parentSelection:   Picking the two parents of each child.
+    offspring:         Crossover and mutation (makeOffspring).
+    evaluation:        Scoring the offspring, evalCache lookups included.
+    localSearch:       Improving the best offspring if localSearchFraction
+                          is in the config file.
+    getLevels:         The MOEA's levels of domination, before and after
+                          survival selection, and its top level.
+    survivalSelection: Joining the parents and children and picking the
+                          survivors.
+    hypervolume:       Updating the MOEA's HypervolumeFront.
+    evalPopulation:    The averages and bests of the log row.
+    logRow:            Formatting and writing the log row.
+    other:             The rest of the generation, such as keeping the best
+                          so far and saving checkpoints.
+
+The counters are the evaluations, the Populations made and the bytes of their
+    genotype arrays, the IndividualGenotypes made, the evalCache hits and
+    misses, and the flips tried by the local search. SolutionBoards are only
+    built for the results of a run, after its profile is taken, so they are
+    not counted.
+"""
+PROFILE_EXTENSION = ".profile.json"
+PHASES = ["parentSelection", "offspring", "evaluation", "localSearch", "getLevels",
+          "survivalSelection", "hypervolume", "evalPopulation", "logRow", "other"]
+COUNTERS = ["evaluations", "populations", "populationBytes", "individuals", "cacheHits",
+            "cacheMisses", "localSearchTrials"]
+PERCENTILES = [50, 90, 99]
+
+# Returns the path of the profile for the log file at logPath.
+def getProfilePath(logPath):
+    return os.path.splitext(logPath)[0] + PROFILE_EXTENSION
+
+"""
+The class PhaseProfiler collects the seconds of each phase of every generation
+    of one run, along with the counters.
+
+lap(phase) adds the time since the last lap, or since startGeneration, to
+    phase, so the phases of a generation are timed one after another with a
+    single call each.
+"""
+class PhaseProfiler:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.generations = []
+        self.current = None
+        self.counts = dict.fromkeys(COUNTERS, 0)
+
+    def startGeneration(self):
+        self.current = [0.0] * len(PHASES)
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.current[PHASES.index(phase)] += now - self.last
+        self.last = now
+
+    def endGeneration(self):
+        self.lap("other")
+        self.generations.append(self.current)
+
+    def count(self, counter, amount=1):
+        self.counts[counter] += amount
+
+    # Returns what is sent back with the run's RunLog: its seconds, its
+    #   counters and a (generations x phases) array of seconds.
+    def getRun(self, evalCache=None):
+        counts = dict(self.counts)
+        if evalCache is not None:
+            counts["cacheHits"] = evalCache.hits
+            counts["cacheMisses"] = evalCache.misses
+        times = np.array(self.generations, dtype='float64').reshape(-1, len(PHASES))
+        return {"seconds": time.perf_counter() - self.start, "counts": counts, "times": times}
+
+# Returns the summary of one or more runs from PhaseProfiler.getRun.
+def getSummary(runs):
+    seconds = sum(run["seconds"] for run in runs)
+    counts = {counter: sum(run["counts"][counter] for run in runs) for counter in COUNTERS}
+    times = np.vstack([np.zeros((0, len(PHASES)))] + [run["times"] for run in runs])
+
+    phases = {}
+    for i, phase in enumerate(PHASES):
+        total = float(times[:, i].sum())
+        if total == 0:
+            continue
+        phases[phase] = {"seconds": total, "share": total / seconds}
+        for percentile, value in zip(PERCENTILES, np.percentile(times[:, i], PERCENTILES).tolist()):
+            phases[phase]["p" + str(percentile)] = value
+        phases[phase]["max"] = float(times[:, i].max())
+
+    return {"seconds": seconds, "generations": len(times),
+            "evalsPerSecond": counts["evaluations"] / seconds if seconds > 0 else 0,
+            "counts": counts, "phases": phases}
+
+"""
+The class ProfileWriter collects the profiles of every run in run order and
+    saves their summaries when closed.
+"""
+class ProfileWriter:
+    def __init__(self, logPath):
+        self.path = getProfilePath(logPath)
+        self.runs = []
+
+    def addRun(self, run):
+        self.runs.append(run)
+
+    def close(self):
+        summary = {"runs": [getSummary([run]) for run in self.runs]}
+        if len(self.runs) > 0:
+            summary["allRuns"] = getSummary(self.runs)
+        with open(self.path, 'w') as file:
+            json.dump(summary, file, indent=2)
@@ -0,0 +1,108 @@
+import numpy as np
+from .board import Board
+
+"""
+Makes random Light Up puzzles of any size for stress testing. Everything is
+    done with whole array operations, so a 2000 x 2000 board takes a few
+    seconds, and the same seed always gives the same puzzle.
+
+Each cell is black with chance blackDensity, and each black cell is numbered
+    with chance numberedRatio. With planted, a layout of bulbs that lights
+    every white cell without two bulbs seeing each other is made first, and
+    every number is the count of those bulbs next to its cell, so the puzzle
+    is sure to have a solution. Without it, each number is drawn at random
+    from what its white neighbors could hold.
+
+The board array uses the same values as Board: -1 for white cells, 0 to 4
+    for numbered black cells and 5 for the others.
+"""
+DEFAULT_BLACK_DENSITY = 0.2
+DEFAULT_NUMBERED_RATIO = 0.5
+
+# Returns (boardArray, bulbs) for a random x by y puzzle, where bulbs is an
+#   (x, y) boolean array of the planted bulbs, or None if planted is False.
+def generatePuzzle(x, y, blackDensity=DEFAULT_BLACK_DENSITY,
+                   numberedRatio=DEFAULT_NUMBERED_RATIO, seed=0, planted=True):
+    rng = np.random.default_rng(seed)
+    isBlack = rng.random((x, y)) < blackDensity
+    isNumbered = isBlack & (rng.random((x, y)) < numberedRatio)
+    isWhite = ~isBlack
+
+    boardArray = np.full((x, y), -1, dtype='int')
+    boardArray[isBlack] = 5
+
+    bulbs = None
+    if planted:
+        bulbs = plantBulbs(isWhite, rng)
+        boardArray[isNumbered] = countNeighbors(bulbs)[isNumbered]
+    else:
+        whiteNeighbors = countNeighbors(isWhite)
+        randomNumbers = np.floor(rng.random((x, y)) * (whiteNeighbors + 1)).astype('int')
+        boardArray[isNumbered] = randomNumbers[isNumbered]
+    return boardArray, bulbs
+
+# Returns an (x, y) array holding how many of the four neighbors of each cell are True.
+def countNeighbors(isTrue):
+    counts = np.zeros(isTrue.shape, dtype='int')
+    counts[1:, :] += isTrue[:-1, :]
+    counts[:-1, :] += isTrue[1:, :]
+    counts[:, 1:] += isTrue[:, :-1]
+    counts[:, :-1] += isTrue[:, 1:]
+    return counts
+
+# Returns an (x, y) boolean array of bulbs that light every white cell with no
+#   two of them seeing each other.
+#
+# Every white cell joins its x segment to its y segment, and a bulb set is
+#   valid exactly when no segment has two bulbs. Every cell is lit exactly when
+#   each cell has a bulb in one of its segments, so the bulbs are a maximal
+#   matching between the x and y segments. It is found in rounds: every cell
+#   whose segments are both still empty draws a random priority, and each
+#   cell that has the lowest priority in both of its segments gets a bulb. The
+#   lowest priority of all always wins, so every round places at least one
+#   bulb, and it takes only a few dozen rounds in practice.
+def plantBulbs(isWhite, rng):
+    xSegmentOf, numXSegments = Board.labelSegments(isWhite.T)
+    xSegmentOf = xSegmentOf.T
+    ySegmentOf, numYSegments = Board.labelSegments(isWhite)
+
+    cells = np.flatnonzero(isWhite)
+    cellX = xSegmentOf.ravel()[cells]
+    cellY = ySegmentOf.ravel()[cells]
+    xHasBulb = np.zeros(numXSegments, dtype='bool')
+    yHasBulb = np.zeros(numYSegments, dtype='bool')
+    bulbs = np.zeros(isWhite.size, dtype='bool')
+
+    while len(cells) > 0:
+        priority = rng.random(len(cells))
+        xLowest = np.full(numXSegments, np.inf)
+        yLowest = np.full(numYSegments, np.inf)
+        np.minimum.at(xLowest, cellX, priority)
+        np.minimum.at(yLowest, cellY, priority)
+        chosen = (priority == xLowest[cellX]) & (priority == yLowest[cellY])
+
+        bulbs[cells[chosen]] = True
+        xHasBulb[cellX[chosen]] = True
+        yHasBulb[cellY[chosen]] = True
+        stillDark = ~xHasBulb[cellX] & ~yHasBulb[cellY]
+        cells, cellX, cellY = cells[stillDark], cellX[stillDark], cellY[stillDark]
+
+    return bulbs.reshape(isWhite.shape)
+
+# Writes boardArray to path in the .lup format that Board reads: x, then y,
+#   then one "x y value" line for every black cell, counting from one.
+def writeLup(path, boardArray):
+    blackCells = np.argwhere(boardArray != -1)
+    values = boardArray[boardArray != -1]
+    lines = np.column_stack((blackCells + 1, values)).tolist()
+    with open(path, 'w') as lupFile:
+        lupFile.write(f"{boardArray.shape[0]}\n{boardArray.shape[1]}\n")
+        lupFile.write("".join(f"{cellX} {cellY} {value}\n" for cellX, cellY, value in lines))
+
+# Writes the planted bulbs to path in the format of a solution file: the
+#   number of lit cells, then one "x y" line per bulb, counting from one.
+def writePlantedSolution(path, boardArray, bulbs):
+    lines = (np.argwhere(bulbs) + 1).tolist()
+    with open(path, 'w') as solFile:
+        solFile.write(str(int(np.sum(boardArray == -1))) + "\n")
+        solFile.write("".join(f"{cellX} {cellY}\n" for cellX, cellY in lines))
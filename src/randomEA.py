@@ -1,31 +1,41 @@
 import json
-import random
+import numpy as np
 from .baseGenotypeSetup import getBaseGenotype
-from .individualGenotype import IndividualGenotype
+from .population import getRandomPopulation, getPopulationFromArrays, getPopulationOf
 from .genotypeOps import breed, survivalSelection
+from .runPool import getRunSeed, mapRuns
+from .logWriter import RunLog
+from .evalCache import getCacheTxt
+from .checkpoint import RunCheckpointer, resumeRun
 
-def runAllEA(board, config, probPath):
-    log = "Result Log\n\n"
+# Writes the log to the LogWriter log and returns the text to put
+#   at the end of the solution file. The runs are done here unless
+#   runResults, the results of seededRunEA in run order, is given.
+def runAllEA(board, config, probPath, log, runResults=None):
+    log.write("Result Log\n\n")
 
-    log += "Problem Instance File: " + probPath + "\n"
-    log += "Solution File: " + config["solPath"] + "\n"
-    log += "Random Seed: " + str(config["usedSeed"]) + "\n\n"
+    log.write("Problem Instance File: " + probPath + "\n")
+    log.write("Solution File: " + config["solPath"] + "\n")
+    log.write("Random Seed: " + str(config["usedSeed"]) + "\n\n")
 
     # Delelte usedSeed because it is not a user parameter, thus should not be put in the log file.
+    usedSeed = config["usedSeed"]
     del config["usedSeed"]
 
-    log += "Config Used:\n"
-    log += json.dumps(config) + "\n\n"
-
-    # Creates the base genotype to be used by all future individuals.
-    baseGenotype = getBaseGenotype(board, config)
+    log.write("Config Used:\n")
+    log.write(json.dumps(config) + "\n\n")
 
     bestOfAllRuns = -1
-    for i in range(config["numOfRuns"]):
-        log += "Run " + str(i + 1) + '\n'
-
-        runLog, runSol = singleRunEA(board, config, baseGenotype)
-        log += runLog
+    cacheHits = 0
+    cacheMisses = 0
+    if runResults is None:
+        runFunction, runArgs = getRunJobEA(board, config, usedSeed)
+        runResults = mapRuns(runFunction, config, runArgs, log)
+    for i, (runLog, runSol, cacheCounts) in enumerate(runResults):
+        log.writeRun(runLog)
+        if cacheCounts is not None:
+            cacheHits += cacheCounts[0]
+            cacheMisses += cacheCounts[1]
 
         # This keeps track of all runs and saves the very best
         # solution to later output.
@@ -33,76 +43,131 @@ def runAllEA(board, config, probPath):
             bestOfAllRuns = runSol.score
             bestSolOfAllRuns = runSol
 
-        log += "\n"
-    log += "Best of all runs: " + str(bestSolOfAllRuns.score)
-    print(log)
+        log.write("\n")
+        log.flush()
+    if "evalCacheSize" in config:
+        log.write(getCacheTxt(cacheHits, cacheMisses))
+    log.write("Best of all runs: " + str(bestSolOfAllRuns.score))
 
     # This will return a string of text that can be put onto the end
     #   of the solution output file.
     solTxt = bestSolOfAllRuns.sol.getTxt()
-    return log, solTxt
-
-def singleRunEA(board, config, baseGenotype):
-    bestRunSoFarScore = -1
-    runLog = ""
-    bestSol = ""
-
-    # The initial population of size mu is created below.
-    population = []
-    for i in range(config["mu"]):
-        population.append(IndividualGenotype(baseGenotype, board, config, brandNew=True))
-    numOfFitnessEvals = config["mu"]
-
-    avgScore, bestScoreInPop, bestIndividualInRun = evalPopulation(population)
-    runLog += str(numOfFitnessEvals) + "\t" + str(avgScore) + '\t' + str(bestScoreInPop) + '\n'
+    return solTxt
 
-    if "noChangeForNEvals" not in config:
-        while numOfFitnessEvals < config["numOfFitnessEvals"]:
-            # Bulk of computing is done below.
-            population = evolve(board, config, population)
-            numOfFitnessEvals += config["lambda"]
-
-            avgScore, bestScoreInPop, bestIndividualInPop = evalPopulation(population)
-            runLog += str(numOfFitnessEvals) + "\t" + str(avgScore) + '\t' + str(bestScoreInPop) + '\n'
-
-            if bestScoreInPop > bestIndividualInRun.score:
-                bestIndividualInRun = bestIndividualInPop
-    else:
+# Returns the function that does one run and the arguments it takes between
+#   the run index and the log writer (see runPool.mapRuns). forcedCells can
+#   be given when forceValidity was already run on the board.
+def getRunJobEA(board, config, usedSeed, forcedCells=None):
+    # Creates the base genotype to be used by all future individuals.
+    baseGenotype = getBaseGenotype(board, config, forcedCells)
+    return seededRunEA, (board, config, baseGenotype, usedSeed)
+
+# Does run runIndex with its own seed. Along with the run's RunLog and results
+#   it returns the run's cache hits and misses, or None if there is no evalCache.
+#   A run with a checkpoint carries on from it (see checkpoint), and with
+#   islands in the config file the run is done on islands (see islands).
+def seededRunEA(runIndex, board, config, baseGenotype, usedSeed, logWriter):
+    if "islands" in config:
+        # Imported here since islands uses this module.
+        from .islands import runIslands
+        return runIslands(runIndex, board, config, baseGenotype, usedSeed, logWriter)
+
+    checkpointer = RunCheckpointer(config, runIndex, usedSeed)
+    runLog = RunLog(logWriter, config.get("telemetry", False) or checkpointer.isOn)
+    runLog.write("Run " + str(runIndex + 1) + '\n')
+
+    baseGenotype.startRun(getRunSeed(usedSeed, runIndex), config)
+    try:
+        state = checkpointer.load()
+        if state is not None:
+            resumeRun(state, baseGenotype, runLog)
+
+        if state is not None and state["isDone"]:
+            runSol = getPopulationFromArrays(baseGenotype, board, config, state["best"]).getIndividual(0)
+            cacheCounts = state["cacheCounts"]
+        else:
+            runSol = singleRunEA(board, config, baseGenotype, runLog, checkpointer, state)
+            cacheCounts = None
+            if baseGenotype.evalCache is not None:
+                cacheCounts = (baseGenotype.evalCache.hits, baseGenotype.evalCache.misses)
+            if baseGenotype.profiler is not None:
+                runLog.profile = baseGenotype.profiler.getRun(baseGenotype.evalCache)
+            checkpointer.saveResult(runLog, getPopulationOf(baseGenotype, board, config, [runSol]).getArrays(),
+                                    cacheCounts)
+    finally:
+        baseGenotype.endRun()
+    return runLog, runSol, cacheCounts
+
+# Writes the run's rows to runLog and returns its best individual. The run
+#   starts from state if it was loaded from a checkpoint.
+def singleRunEA(board, config, baseGenotype, runLog, checkpointer, state=None):
+    if state is None:
+        # The initial population of size mu is created below.
+        population = getRandomPopulation(baseGenotype, board, config, config["mu"])
+        population.evaluate()
+        numOfFitnessEvals = config["mu"]
+
+        avgScore, bestScoreInPop, bestIndividualInRun = evalPopulation(population)
+        runLog.writeRow((numOfFitnessEvals, avgScore, bestScoreInPop))
         evalsWithoutChange = 0
-        while numOfFitnessEvals < config["numOfFitnessEvals"]:
-            population = evolve(board, config, population)
-            numOfFitnessEvals += config["lambda"]
-
-            avgScore, bestScoreInPop, bestIndividualInPop = evalPopulation(population)
-            runLog += str(numOfFitnessEvals) + "\t" + str(avgScore) + '\t' + str(bestScoreInPop) + '\n'
-
-            if bestScoreInPop > bestIndividualInRun.score:
-                bestIndividualInRun = bestIndividualInPop
-                evalsWithoutChange = 0
-            else:
-                evalsWithoutChange += config["lambda"]
-                if evalsWithoutChange >= config["noChangeForNEvals"]:
-                    break
-    return runLog, bestIndividualInRun
+    else:
+        population = getPopulationFromArrays(baseGenotype, board, config, state["population"])
+        numOfFitnessEvals = state["numOfFitnessEvals"]
+        bestIndividualInRun = getPopulationFromArrays(baseGenotype, board, config,
+                                                      state["best"]).getIndividual(0)
+        evalsWithoutChange = state["evalsWithoutChange"]
+
+    profiler = baseGenotype.profiler
+    while numOfFitnessEvals < config["numOfFitnessEvals"]:
+        if profiler is not None:
+            profiler.startGeneration()
+        # Bulk of computing is done below.
+        population = evolve(board, config, population)
+        evals = config["lambda"] + baseGenotype.takeExtraEvals()
+        numOfFitnessEvals += evals
+
+        avgScore, bestScoreInPop, bestIndividualInPop = evalPopulation(population)
+        if profiler is not None:
+            profiler.lap("evalPopulation")
+        runLog.writeRow((numOfFitnessEvals, avgScore, bestScoreInPop))
+        if profiler is not None:
+            profiler.lap("logRow")
+
+        if bestScoreInPop > bestIndividualInRun.score:
+            bestIndividualInRun = bestIndividualInPop
+            evalsWithoutChange = 0
+        else:
+            evalsWithoutChange += evals
+            if "noChangeForNEvals" in config and evalsWithoutChange >= config["noChangeForNEvals"]:
+                if profiler is not None:
+                    profiler.endGeneration()
+                break
+
+        if checkpointer.isDue(numOfFitnessEvals):
+            checkpointer.saveProgress(baseGenotype, runLog, {
+                "numOfFitnessEvals": numOfFitnessEvals,
+                "evalsWithoutChange": evalsWithoutChange,
+                "population": population.getArrays(),
+                "best": getPopulationOf(baseGenotype, board, config, [bestIndividualInRun]).getArrays(),
+            })
+        if profiler is not None:
+            profiler.endGeneration()
+    return bestIndividualInRun
 
 def evolve(board, config, population):
     # Parent Select, offspring creation, and mutation.
     population = breed(population, board, config)
     # Survivor selection.
-    return survivalSelection(population, board, config)
+    survivors = survivalSelection(population, board, config)
+    if population.baseGenotype.profiler is not None:
+        population.baseGenotype.profiler.lap("survivalSelection")
+    return survivors
 
-# Returns useful info about the population.
+# Returns useful info about the population. The best individual is the first
+#   one with the best score.
 def evalPopulation(population):
-    totScore = 0
-    bestScore = -1
-    bestIndividual = ""
-
-    for individual in population:
-        curScore = individual.score
-        totScore += curScore
-        if curScore > bestScore:
-            bestScore = curScore
-            bestIndividual = individual
-
-    avgScore = totScore / len(population)
-    return avgScore, bestScore, bestIndividual
+    best = int(np.argmax(population.scores))
+    bestIndividual = population.getIndividual(best)
+
+    avgScore = float(population.scores.mean())
+    return avgScore, bestIndividual.score, bestIndividual
@@ -1,122 +1,249 @@
 import json
-import random
+import numpy as np
 from .baseGenotypeSetup import getBaseGenotype
-from .individualGenotype import IndividualGenotype
-from .genotypeOps import breed, survivalSelection
+from .population import getRandomPopulation, getPopulationFromArrays, getPopulationOf
+from .genotypeOps import breed, getSurvivorIndexes
+from .runPool import getRunSeed, mapRuns
+from .logWriter import RunLog
+from .evalCache import getCacheTxt
+from .checkpoint import RunCheckpointer, resumeRun
 from .moeaOps import *
+from .hypervolume import HypervolumeFront, getLevelVolume, VOLUME_TOLERANCE
 
-def runAllMOEA(board, config, probPath):
-    log = "Result Log\n\n"
+# Writes the log to the LogWriter log and returns the text to put
+#   at the end of the solution file. The runs are done here unless
+#   runResults, the results of seededRunMOEA in run order, is given.
+def runAllMOEA(board, config, probPath, log, runResults=None):
+    log.write("Result Log\n\n")
 
-    log += "Problem Instance File: " + probPath + "\n"
-    log += "Solution File: " + config["solPath"] + "\n"
-    log += "Random Seed: " + str(config["usedSeed"]) + "\n\n"
+    log.write("Problem Instance File: " + probPath + "\n")
+    log.write("Solution File: " + config["solPath"] + "\n")
+    log.write("Random Seed: " + str(config["usedSeed"]) + "\n\n")
 
     # Delelte usedSeed because it is not a user parameter, thus should not be put in the log file.
+    usedSeed = config["usedSeed"]
     del config["usedSeed"]
 
-    log += "Config Used:\n"
-    log += json.dumps(config) + "\n\n"
-
-    # Creates the base genotype to be used by all future individuals.
-    baseGenotype = getBaseGenotype(board, config)
+    log.write("Config Used:\n")
+    log.write(json.dumps(config) + "\n\n")
 
     firstRun = True
-    for i in range(config["numOfRuns"]):
-        log += "Run " + str(i + 1) + '\n'
-
-        runLog, topLevel = singleRunMOEA(board, config, baseGenotype)
-        log += runLog
+    useHypervolume = config.get("useHypervolume", False)
+    cacheHits = 0
+    cacheMisses = 0
+    if runResults is None:
+        runFunction, runArgs = getRunJobMOEA(board, config, usedSeed)
+        runResults = mapRuns(runFunction, config, runArgs, log)
+    for i, (runLog, topLevel, cacheCounts) in enumerate(runResults):
+        log.writeRun(runLog)
+        if cacheCounts is not None:
+            cacheHits += cacheCounts[0]
+            cacheMisses += cacheCounts[1]
 
         # This keeps track of all runs and saves the very best
         # solution to later output.
         if firstRun:
             bestLevelOfAllRuns = topLevel
+            if useHypervolume:
+                bestVolumeOfAllRuns = getLevelVolume(topLevel)
             firstRun = False
+        elif useHypervolume:
+            topVolume = getLevelVolume(topLevel)
+            if topVolume > bestVolumeOfAllRuns + VOLUME_TOLERANCE:
+                bestLevelOfAllRuns = topLevel
+                bestVolumeOfAllRuns = topVolume
         else:
             bestLevelOfAllRuns, _ = compareDomination(bestLevelOfAllRuns, topLevel)
 
-        log += "\n"
-    print(log)
+        log.write("\n")
+        log.flush()
+    if "evalCacheSize" in config:
+        log.write(getCacheTxt(cacheHits, cacheMisses))
 
     # This will return a string of text that can be put onto the end
     #   of the solution output file.
     #solTxt = bestSolOfAllRuns.sol.getTxt()
     solTxt = getSolTxt(bestLevelOfAllRuns)
-    return log, solTxt
+    return solTxt
+
+# Returns the function that does one run and the arguments it takes between
+#   the run index and the log writer (see runPool.mapRuns). forcedCells can
+#   be given when forceValidity was already run on the board.
+def getRunJobMOEA(board, config, usedSeed, forcedCells=None):
+    # Creates the base genotype to be used by all future individuals.
+    baseGenotype = getBaseGenotype(board, config, forcedCells)
+    return seededRunMOEA, (board, config, baseGenotype, usedSeed)
+
+# Does run runIndex with its own seed. Along with the run's RunLog and results
+#   it returns the run's cache hits and misses, or None if there is no evalCache.
+#   A run with a checkpoint carries on from it (see checkpoint), and with
+#   islands in the config file the run is done on islands (see islands).
+def seededRunMOEA(runIndex, board, config, baseGenotype, usedSeed, logWriter):
+    if "islands" in config:
+        # Imported here since islands uses this module.
+        from .islands import runIslands
+        return runIslands(runIndex, board, config, baseGenotype, usedSeed, logWriter)
+
+    checkpointer = RunCheckpointer(config, runIndex, usedSeed)
+    runLog = RunLog(logWriter, config.get("telemetry", False) or checkpointer.isOn)
+    runLog.write("Run " + str(runIndex + 1) + '\n')
+
+    baseGenotype.startRun(getRunSeed(usedSeed, runIndex), config)
+    try:
+        state = checkpointer.load()
+        if state is not None:
+            resumeRun(state, baseGenotype, runLog)
+
+        if state is not None and state["isDone"]:
+            best = getPopulationFromArrays(baseGenotype, board, config, state["best"])
+            topLevel = best.getIndividuals(range(len(best)))
+            cacheCounts = state["cacheCounts"]
+        else:
+            topLevel = singleRunMOEA(board, config, baseGenotype, runLog, checkpointer, state)
+            cacheCounts = None
+            if baseGenotype.evalCache is not None:
+                cacheCounts = (baseGenotype.evalCache.hits, baseGenotype.evalCache.misses)
+            if baseGenotype.profiler is not None:
+                runLog.profile = baseGenotype.profiler.getRun(baseGenotype.evalCache)
+            checkpointer.saveResult(runLog, getPopulationOf(baseGenotype, board, config, topLevel).getArrays(),
+                                    cacheCounts)
+    finally:
+        baseGenotype.endRun()
+    return runLog, topLevel, cacheCounts
 
-def singleRunMOEA(board, config, baseGenotype):
-    runLog = ""
-    bestSol = ""
+# Writes the run's rows to runLog and returns its best top level. The run
+#   starts from state if it was loaded from a checkpoint.
+def singleRunMOEA(board, config, baseGenotype, runLog, checkpointer, state=None):
+    # With useHypervolume, the front keeps the hypervolume of the current top
+    #   level, which is logged as an extra column and used to compare fronts.
+    useHypervolume = config.get("useHypervolume", False)
 
-    # The initial population of size mu is created below.
-    population = []
-    for i in range(config["mu"]):
-        population.append(IndividualGenotype(baseGenotype, board, config, brandNew=True))
-    numOfFitnessEvals = config["mu"]
-    levels = getLevels(population)
+    if state is None:
+        # The initial population of size mu is created below.
+        population = getRandomPopulation(baseGenotype, board, config, config["mu"])
+        population.evaluate()
+        numOfFitnessEvals = config["mu"]
+        levels = getLevels(population)
+        topLevel = population.getIndividuals(levels[0])
+
+        front = HypervolumeFront()
+        if useHypervolume:
+            front.update(topLevel)
+
+        runLog.writeRow(getRow(numOfFitnessEvals, population, front, useHypervolume))
 
-    avg1, b1, avg2, b2, avg3, b3 = evalPopulation(population)
-    runLog += f"{numOfFitnessEvals}\t{avg1}\t{b1}\t{avg2}\t{b2}\t{avg3}\t{b3}\n"
+        bestTopLevel = topLevel
+        bestVolume = front.volume
+        evalsWithoutChange = 0
+    else:
+        population = getPopulationFromArrays(baseGenotype, board, config, state["population"])
+        numOfFitnessEvals = state["numOfFitnessEvals"]
+        front = state["front"]
+        best = getPopulationFromArrays(baseGenotype, board, config, state["best"])
+        bestTopLevel = best.getIndividuals(range(len(best)))
+        bestVolume = state["bestVolume"]
+        evalsWithoutChange = state["evalsWithoutChange"]
 
-    bestTopLevel = levels[0]
-    evalsWithoutChange = 0
     if "noChangeForNEvals" in config:
         noChangeForNEvals = config["noChangeForNEvals"]
     else:
         noChangeForNEvals = config["numOfFitnessEvals"] # This will never terminate early.
 
+    profiler = baseGenotype.profiler
     while numOfFitnessEvals < config["numOfFitnessEvals"]:
-        population = evolve(board, config, population)
-        numOfFitnessEvals += config["lambda"]
+        if profiler is not None:
+            profiler.startGeneration()
+        population, levels = evolve(board, config, population)
+        evals = config["lambda"] + baseGenotype.takeExtraEvals()
+        numOfFitnessEvals += evals
+        topLevel = population.getIndividuals(levels[0])
+        if profiler is not None:
+            profiler.lap("getLevels")
 
-        levels = getLevels(population)
-        avg1, b1, avg2, b2, avg3, b3 = evalPopulation(population)
-        runLog += f"{numOfFitnessEvals}\t{avg1}\t{b1}\t{avg2}\t{b2}\t{avg3}\t{b3}\n"
+        if useHypervolume:
+            front.update(topLevel)
+            if profiler is not None:
+                profiler.lap("hypervolume")
+        row = getRow(numOfFitnessEvals, population, front, useHypervolume)
+        if profiler is not None:
+            profiler.lap("evalPopulation")
+        runLog.writeRow(row)
+        if profiler is not None:
+            profiler.lap("logRow")
 
-        bestTopLevel, stayedSame = compareDomination(bestTopLevel, levels[0])
+        if useHypervolume:
+            stayedSame = front.volume <= bestVolume + VOLUME_TOLERANCE
+            if not stayedSame:
+                bestTopLevel = topLevel
+                bestVolume = front.volume
+        else:
+            bestTopLevel, stayedSame = compareDomination(bestTopLevel, topLevel)
         if stayedSame:
-            evalsWithoutChange += config["lambda"]
+            evalsWithoutChange += evals
             if evalsWithoutChange >= noChangeForNEvals:
+                if profiler is not None:
+                    profiler.endGeneration()
                 break
         else:
             evalsWithoutChange = 0
 
-    return runLog, bestTopLevel
+        if checkpointer.isDue(numOfFitnessEvals):
+            checkpointer.saveProgress(baseGenotype, runLog, {
+                "numOfFitnessEvals": numOfFitnessEvals,
+                "evalsWithoutChange": evalsWithoutChange,
+                "population": population.getArrays(),
+                "best": getPopulationOf(baseGenotype, board, config, bestTopLevel).getArrays(),
+                "front": front,
+                "bestVolume": bestVolume,
+            })
+        if profiler is not None:
+            profiler.endGeneration()
 
+    return bestTopLevel
+
+# Returns the survivors along with their levels of domination.
 def evolve(board, config, population):
     # Parent Select, offspring creation, and mutation.
+    profiler = population.baseGenotype.profiler
     population = breed(population, board, config)
-    getLevels(population) # Done to get scores on new genotypes
+    levels = getLevels(population) # Done to get scores on new genotypes
+    if profiler is not None:
+        profiler.lap("getLevels")
     # Survivor selection.
-    return survivalSelection(population, board, config)
+    survivorIndexes = getSurvivorIndexes(population, board, config)
+    survivors = population.take(survivorIndexes)
+    if profiler is not None:
+        profiler.lap("survivalSelection")
+
+    # Truncation keeps whole levels from the top down, plus part of one more.
+    #   Everything that dominates a survivor survives too, so each survivor
+    #   keeps its level and score, and the levels only need to be moved over
+    #   to the survivors' rows.
+    if "survivalTournyK" not in config and config["survivalTruncation"]:
+        newRows = np.full(len(population), -1)
+        newRows[survivorIndexes] = np.arange(len(survivorIndexes))
+        levels = [[newRows[row] for row in level if newRows[row] >= 0] for level in levels]
+        levels = [level for level in levels if len(level) > 0]
+    else:
+        levels = getLevels(survivors)
+    if profiler is not None:
+        profiler.lap("getLevels")
+
+    return survivors, levels
+
+# Returns the values of the log row of one generation, with the hypervolume
+#   of the front at the end if useHypervolume is on.
+def getRow(numOfFitnessEvals, population, front, useHypervolume):
+    row = (numOfFitnessEvals,) + evalPopulation(population)
+    if useHypervolume:
+        row += (front.volume,)
+    return row
 
 # Returns useful info about the population.
 def evalPopulation(population):
-    total1 = 0
-    total2 = 0
-    total3 = 0
-    best1 = -1
-    best2 = -1
-    best3 = -1
-    for ind in population:
-        curMoea = ind.moea
-        total1 += curMoea[0]
-        total2 += curMoea[1]
-        total3 += curMoea[2]
-
-        if curMoea[0] > best1:
-            best1 = curMoea[0]
-        if curMoea[1] > best2:
-            best2 = curMoea[1]
-        if curMoea[2] > best3:
-            best3 = curMoea[2]
-
-    total1 /= len(population)
-    total2 /= len(population)
-    total3 /= len(population)
-
-    return total1, best1, total2, best2, total3, best3
+    averages = population.moeas.mean(axis=0).tolist()
+    bests = population.moeas.max(axis=0).tolist()
+    return averages[0], bests[0], averages[1], bests[1], averages[2], bests[2]
 
 def getSolTxt(level):
     solTxt = ""
@@ -1,26 +1,41 @@
 import json
-import random
+import numpy as np
 from .solutionBoard import SolutionBoard
+from .batchEvaluator import BatchEvaluator
+from .runPool import getRunSeed, mapRuns
+from .logWriter import RunLog
 
-def runAllRandom(board, config, probPath):
-    log = "Result Log\n\n"
+# The most random boards scored together when batchSize is not in the config.
+DEFAULT_BATCH_SIZE = 1000
+# Without batchSize, a batch is also kept to about this many cells (boards
+#   times white cells), so large boards use fewer boards per batch.
+DEFAULT_BATCH_CELLS = 2 ** 22
+# The rows of a batch whose lights are placed at a time in randomBoards.
+PLACEMENT_ROWS = 64
 
-    log += "Problem Instance File: " + probPath + "\n"
-    log += "Solution File: " + config["solPath"] + "\n"
-    log += "Random Seed: " + str(config["usedSeed"]) + "\n\n"
+# Writes the log to the LogWriter log and returns the text to put
+#   at the end of the solution file. The runs are done here unless
+#   runResults, the results of seededRunRandom in run order, is given.
+def runAllRandom(board, config, probPath, log, runResults=None):
+    log.write("Result Log\n\n")
+
+    log.write("Problem Instance File: " + probPath + "\n")
+    log.write("Solution File: " + config["solPath"] + "\n")
+    log.write("Random Seed: " + str(config["usedSeed"]) + "\n\n")
 
     # Delelte usedSeed because it is not a user parameter, thus should not be put in the log file.
+    usedSeed = config["usedSeed"]
     del config["usedSeed"]
 
-    log += "Config Used:\n"
-    log += json.dumps(config) + "\n\n"
+    log.write("Config Used:\n")
+    log.write(json.dumps(config) + "\n\n")
 
     bestOfAllRuns = -1
-    for i in range(config["numOfRuns"]):
-        log += "Run " + str(i + 1) + '\n'
-
-        runLog, runSol = singleRunRandom(board, config)
-        log += runLog
+    if runResults is None:
+        runFunction, runArgs = getRunJobRandom(board, config, usedSeed)
+        runResults = mapRuns(runFunction, config, runArgs, log)
+    for i, (runLog, runSol) in enumerate(runResults):
+        log.writeRun(runLog)
 
         # This keeps track of all runs and saves the very best
         # solution to later output.
@@ -28,37 +43,90 @@ def runAllRandom(board, config, probPath):
             bestOfAllRuns = runSol.score
             bestSolOfAllRuns = runSol
 
-        log += "\n"
-    log += "Best of all runs: " + str(bestSolOfAllRuns.score)
-    print(log)
+        log.write("\n")
+        log.flush()
+    log.write("Best of all runs: " + str(bestSolOfAllRuns.score))
 
     # This will return a string of text that can be put onto the end
     # of the solution output file.
     solTxt = bestSolOfAllRuns.getTxt()
-    return log, solTxt
+    return solTxt
+
+# Returns the function that does one run and the arguments it takes between
+#   the run index and the log writer (see runPool.mapRuns). Random Search
+#   does not use forcedCells.
+def getRunJobRandom(board, config, usedSeed, forcedCells=None):
+    # Every white cell is a gene for the random search.
+    evaluator = BatchEvaluator(board, config, board.whiteCellArray)
+    return seededRunRandom, (board, config, evaluator, usedSeed)
+
+# Does run runIndex with its own seed. Returns the run's RunLog and best SolutionBoard.
+def seededRunRandom(runIndex, board, config, evaluator, usedSeed, logWriter):
+    runLog = RunLog(logWriter, config.get("telemetry", False))
+    runLog.write("Run " + str(runIndex + 1) + '\n')
+
+    rng = np.random.default_rng(getRunSeed(usedSeed, runIndex))
+    runSol = singleRunRandom(board, config, evaluator, rng, runLog)
+    return runLog, runSol
 
-def singleRunRandom(board, config):
+# Writes the run's rows to runLog and returns its best SolutionBoard. A row is
+#   written each time a board scores better than every one before it.
+def singleRunRandom(board, config, evaluator, rng, runLog):
     bestRunSoFar = -1
-    runLog = ""
-    bestSol = ""
-    for i in range(config["numOfFitnessEvals"]):
-        # Creates the random search and stores the
-        # fitness and the solution itself.
-        curRun, curSol = randomBoard(board, config)
-
-        if curRun > bestRunSoFar:
-            runLog += str(i + 1) + "\t" + str(curRun) + '\n'
+    bestLights = np.zeros(board.whiteCount, dtype='bool')
+    batchSize = getBatchSize(board, config)
+
+    for batchStart in range(0, config["numOfFitnessEvals"], batchSize):
+        batchEnd = min(batchStart + batchSize, config["numOfFitnessEvals"])
+
+        # Creates the random boards of this batch and scores them all at once.
+        genes = randomBoards(board, rng, batchEnd - batchStart)
+        batchScores = getScores(evaluator, evaluator.evaluate(genes))
+
+        # The boards that beat the best score of every board before them.
+        bestBefore = np.maximum.accumulate(np.concatenate(([bestRunSoFar], batchScores)))[:-1]
+        for row in np.flatnonzero(batchScores > bestBefore).tolist():
+            curRun = float(batchScores[row])
+            runLog.writeRow((batchStart + row + 1, curRun))
             bestRunSoFar = curRun
-            bestSol = curSol
+            bestLights = genes[row]
+
+    # Only the best random board of the run is turned into a SolutionBoard.
+    lightPositions = [tuple(cell) for cell in board.whiteCellArray[bestLights].tolist()]
+    bestSol = SolutionBoard(board, config, lightPositions)
+    return bestSol
+
+# Returns batchSize from the config, or the default for the size of board.
+def getBatchSize(board, config):
+    if "batchSize" in config:
+        return config["batchSize"]
+    return min(DEFAULT_BATCH_SIZE, max(1, DEFAULT_BATCH_CELLS // board.whiteCount))
 
-    return runLog, bestSol
+# Returns a (count x white cells) boolean array of random boards. Each board
+#   first gets a number of lights to place, from one to every white cell,
+#   and then that many white cells picked at random.
+#
+# Every row of a random ordering of the white cells has a light on the cells
+#   that come before that row's number of lights. The orderings are shuffled
+#   in place as uint32, and the lights are placed PLACEMENT_ROWS rows at a
+#   time, so a batch takes about five bytes per cell.
+def randomBoards(board, rng, count):
+    whiteCount = board.whiteCount
+    numOfLights = rng.integers(whiteCount, size=count) + 1
+    orders = np.tile(np.arange(whiteCount, dtype='uint32'), (count, 1))
+    rng.permuted(orders, axis=1, out=orders)
 
-def randomBoard(board, config):
-    # First selects a number of lights to place.
-    # Then it picks those lights from the list of white cells.
-    numOfLights = random.randrange(board.whiteCount) + 1
-    lightPositions = random.sample(board.whiteCells, k=numOfLights)
+    genes = np.zeros((count, whiteCount), dtype='bool')
+    cellRanks = np.arange(whiteCount)
+    for start in range(0, count, PLACEMENT_ROWS):
+        end = min(start + PLACEMENT_ROWS, count)
+        np.put_along_axis(genes[start:end], orders[start:end].astype('intp'),
+                          cellRanks < numOfLights[start:end, None], axis=1)
+    return genes
 
-    # Sends the light positions to get back a solution board.
-    sol = SolutionBoard(board, config, lightPositions)
-    return sol.score, sol
+# Returns the scores of the counts given back by evaluator.evaluate as an
+#   array. This is getValue done on whole arrays, where the violation total
+#   is always zero.
+def getScores(evaluator, counts):
+    litCount = counts[0]
+    return litCount / evaluator.board.whiteCount
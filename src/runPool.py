@@ -0,0 +1,53 @@
+import numpy as np
+
+"""
+Helpers for spreading the independent runs of runAllEA, runAllMOEA and
+    runAllRandom over a pool of processes when workers is in the config file.
+
+Every run is seeded on its own with getRunSeed, so the result of each run
+    only depends on usedSeed and the run index. The results are handed back
+    in run order, which makes the log and solution files the same for any
+    number of workers.
+"""
+
+# The arguments shared by every run, set once in each worker process.
+_runArgs = ()
+
+# Returns the seed for run runIndex (counting from zero) of a job seeded with usedSeed.
+def getRunSeed(usedSeed, runIndex):
+    return int(np.random.SeedSequence([usedSeed, runIndex]).generate_state(1)[0])
+
+# Returns how many runs config does. The exact search has no randomness, so
+#   it is only done once.
+def getNumOfRuns(config):
+    if config["searchAlgorithm"] == "Exact":
+        return 1
+    return config["numOfRuns"]
+
+def setRunArgs(*args):
+    global _runArgs
+    _runArgs = args
+
+def callRun(runFunction, runIndex):
+    return runFunction(runIndex, *_runArgs, None)
+
+# Yields runFunction(runIndex, *args, logWriter) for every run index in run
+#   order. runFunction must be defined at the top level of a module so that
+#   worker processes can find it. The args are only sent once per worker.
+#   Runs done in this process write their log rows straight to logWriter,
+#   while runs in a worker are given None and send their rows back instead.
+def mapRuns(runFunction, config, args, logWriter):
+    workers = config.get("workers", 1)
+    if workers <= 1:
+        for runIndex in range(getNumOfRuns(config)):
+            yield runFunction(runIndex, *args, logWriter)
+        return
+
+    # Imported here so jobs without workers do not load multiprocessing.
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=setRunArgs,
+                             initargs=args) as pool:
+        futures = [pool.submit(callRun, runFunction, runIndex)
+                   for runIndex in range(getNumOfRuns(config))]
+        for future in futures:
+            yield future.result()
@@ -18,9 +18,10 @@ The board is created with the following numbers and what they represent:
 """
 class SolutionBoard:
     def __init__(self, startBoard, config, lightPositions):
-        # Copys the starting board to avoid changing by reference the board
-        # without lights.
-        self.board = np.copy(startBoard.board)
+        # The board itself is only built if something asks for it, since the
+        #   scores below come straight from the segment index of startBoard.
+        self.startBoard = startBoard
+        self._board = None
 
         self.config = config
         self.lightPositions = lightPositions
@@ -34,8 +35,6 @@ class SolutionBoard:
         # The lit cell count starts off at the number of bulbs being sent.
         self.litCount = len(lightPositions)
 
-        self.placeLights()
-
         # Later going to be added to and multiplied by penalty coefficient.
         self.lightViolations = 0
         self.blackCellViolations = 0
@@ -69,111 +68,56 @@ class SolutionBoard:
             if self.violations > 0:
                 self.score = 0
 
-    def placeLights(self):
-        for x, y in self.lightPositions:
-            self.board[x][y] = 10
+    # The board with the numbers described at the top of the file. It is
+    #   built the first time it is asked for and then kept.
+    @property
+    def board(self):
+        if self._board is None:
+            board = np.copy(self.startBoard.board)
+            white = self.startBoard.whiteCellArray
+            lit = white[self.litCells]
+            board[lit[:, 0], lit[:, 1]] = -9
+            for x, y in self.lightPositions:
+                board[x][y] = 10
+            self._board = board
+        return self._board
 
     def setLitCount(self):
+        startBoard = self.startBoard
+        positions = np.array(self.lightPositions, dtype='int').reshape(-1, 2)
+        self.bulbCells = startBoard.cellIndex[positions[:, 0], positions[:, 1]]
+
         # Checks to see if the config is enforcing the black number constraint.
         if self.config["enforceBlackCellConstraint"]:
             self.isBlackCellValid() # Increases the number of violations.
 
-        for x, y in self.lightPositions:
-            # These functions count number of lit cells and increase the number
-            #   of violations if they run into another light.
-            self.upX(x, y)
-            self.downX(x, y)
-            self.upY(x, y)
-            self.downY(x, y)
-
-    # The next four functions go through the board for each light and "light up"
-    # the surrounding cells. If they run into another light, the functions
-    # will return True, triggering the score to become zero.
-    def upX(self, x, y):
-        tempX = x + 1
-        while tempX != self.xLimit:
-            cellVal = self.board[tempX][y]
-            if cellVal == 10:
-                self.lightViolations += 1
-                break
-            elif cellVal  >= 0:
-                break
-            elif cellVal == -1:
-                self.board[tempX][y] = -9
-                self.litCount += 1
-            tempX += 1
-
-    def upY(self, x, y):
-        tempY = y + 1
-        while tempY != self.yLimit:
-            cellVal = self.board[x][tempY]
-            if cellVal == 10:
-                self.lightViolations += 1
-                break
-            elif cellVal  >= 0:
-                break
-            elif cellVal == -1:
-                self.board[x][tempY] = -9
-                self.litCount += 1
-            tempY += 1
-
-    def downX(self, x, y):
-        tempX = x - 1
-        while tempX != -1:
-            cellVal = self.board[tempX][y]
-            if cellVal == 10:
-                self.lightViolations += 1
-                break
-            elif cellVal  >= 0:
-                break
-            elif cellVal == -1:
-                self.board[tempX][y] = -9
-                self.litCount += 1
-            tempX -= 1
-
-    def downY(self, x, y):
-        tempY = y - 1
-        while tempY != -1:
-            cellVal = self.board[x][tempY]
-            if cellVal == 10:
-                self.lightViolations += 1
-                break
-            elif cellVal  >= 0:
-                break
-            elif cellVal == -1:
-                self.board[x][tempY] = -9
-                self.litCount += 1
-            tempY -= 1
-
-    # Returns True only if all black cell conditions are met.
+        # Every bulb lights its whole x and y segment. Bulbs sharing a segment
+        #   see each other, and each neighboring pair counts once from each side.
+        self.xBulbs = np.bincount(startBoard.cellXSegment[self.bulbCells],
+                                  minlength=startBoard.numXSegments)
+        self.yBulbs = np.bincount(startBoard.cellYSegment[self.bulbCells],
+                                  minlength=startBoard.numYSegments)
+        self.lightViolations += 2 * int(np.maximum(self.xBulbs - 1, 0).sum())
+        self.lightViolations += 2 * int(np.maximum(self.yBulbs - 1, 0).sum())
+
+        self.litCells = (self.xBulbs[startBoard.cellXSegment] > 0) | \
+                        (self.yBulbs[startBoard.cellYSegment] > 0)
+        # The bulbs were already counted, so only the lit cells without one are added.
+        self.litCount += int(np.count_nonzero(self.litCells)) - len(self.bulbCells)
+
+    # Adds the difference between each numbered black cell's number
+    # and the count of bulbs directly beside it to the violations.
     # Does not check validity of lights hitting each other.
     def isBlackCellValid(self):
-        for x, y in self.blackCells:
-            cellVal = self.board[x][y]
-            if cellVal == 5:
-                continue
-
-            neighboringLights = 0
-            if x != 0:
-                tempX = x - 1
-                if self.board[tempX][y] == 10:
-                    neighboringLights += 1
-            if x != (self.xLimit - 1):
-                tempX = x + 1
-                if self.board[tempX][y] == 10:
-                    neighboringLights += 1
-
-            if y != 0:
-                tempY = y - 1
-                if self.board[x][tempY] == 10:
-                    neighboringLights += 1
-            if y != (self.yLimit - 1):
-                tempY = y + 1
-                if self.board[x][tempY] == 10:
-                    neighboringLights += 1
-
-            if neighboringLights != cellVal:
-                self.blackCellViolations += abs(neighboringLights - cellVal)
+        startBoard = self.startBoard
+        isBulb = np.zeros(startBoard.whiteCount, dtype='bool')
+        isBulb[self.bulbCells] = True
+
+        neighboringLights = np.bincount(startBoard.adjNumbered,
+                                        weights=isBulb[startBoard.adjWhite],
+                                        minlength=len(startBoard.numberedCells))
+        diff = np.abs(neighboringLights - startBoard.numberedValues)
+        self.blackCellViolations += int(diff.sum())
 
     # Returns the positions of the placed lights in a format
     # suitable for the solution output file.
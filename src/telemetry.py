@@ -0,0 +1,83 @@
+import os
+import numpy as np
+
+"""
+The binary telemetry sidecar is a copy of the numbers in the log file that
+    can be read back without parsing text. It is only written if telemetry is
+    true in the config file, next to the log file with the same name and a
+    .npy extension (logs/d1Log.txt gives logs/d1Log.npy).
+
+The file is a single 2D float64 NumPy array with one row per log row. Column
+    0 is the run number, counting from one, and the rest are the columns of
+    the log row in the same order:
+
+    Random Search:  evals, best
+    EA:             evals, average, best
+    MOEA:           evals, average1, best1, average2, best2, average3, best3,
+                    and hypervolume if useHypervolume is on
+
+Since it is a plain .npy file it can be opened with
+    np.load(path, mmap_mode='r') to read only the parts that are needed.
+"""
+TELEMETRY_EXTENSION = ".npy"
+
+# The names of the log columns for each possible number of columns.
+COLUMN_NAMES = {
+    2: ["evals", "best"],
+    3: ["evals", "average", "best"],
+    7: ["evals", "average1", "best1", "average2", "best2", "average3", "best3"],
+    8: ["evals", "average1", "best1", "average2", "best2", "average3", "best3", "hypervolume"],
+}
+
+# Returns the path of the sidecar for the log file at logPath.
+def getTelemetryPath(logPath):
+    return os.path.splitext(logPath)[0] + TELEMETRY_EXTENSION
+
+# Returns the names of the numOfColumns log columns of a sidecar, not
+#   counting the run number.
+def getColumnNames(numOfColumns):
+    if numOfColumns in COLUMN_NAMES:
+        return COLUMN_NAMES[numOfColumns]
+    return ["evals"] + ["column" + str(i) for i in range(1, numOfColumns)]
+
+"""
+The class TelemetryWriter collects the rows of every run in run order and
+    saves them to the sidecar when closed.
+"""
+class TelemetryWriter:
+    def __init__(self, logPath):
+        self.path = getTelemetryPath(logPath)
+        self.runs = []
+
+    # rows is a list of the numeric log rows of the next run.
+    def addRun(self, rows):
+        runTable = np.array(rows, dtype='float64').reshape(len(rows), -1)
+        runNumber = np.full((len(rows), 1), len(self.runs) + 1, dtype='float64')
+        self.runs.append(np.hstack((runNumber, runTable)))
+
+    def close(self):
+        numOfColumns = max([run.shape[1] for run in self.runs], default=1)
+        table = np.vstack([np.zeros((0, numOfColumns))] +
+                          [run for run in self.runs if len(run) > 0])
+        np.save(self.path, table)
+
+# Returns the telemetry table of a log file that was written as text, so older
+#   logs can be turned into sidecars. Rows are the lines made only of numbers
+#   separated by tabs, and each "Run i" line starts a new run.
+def readTextLog(path):
+    rows = []
+    runNumber = 0
+    with open(path, 'r') as logFile:
+        for line in logFile:
+            if line.startswith("Run "):
+                runNumber += 1
+                continue
+            if runNumber == 0 or "\t" not in line:
+                continue
+            try:
+                rows.append([runNumber] + [float(value) for value in line.split("\t")])
+            except ValueError:
+                continue
+    if len(rows) == 0:
+        return np.zeros((0, 1))
+    return np.array(rows, dtype='float64')
@@ -0,0 +1,187 @@
+#!/usr/bin/python3
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.telemetry import TELEMETRY_EXTENSION, getTelemetryPath, getColumnNames, readTextLog
+
+"""
+Aggregates the telemetry sidecars of many runs of main.py. Run it from the
+    top of the repository with:
+
+    python3 -m tools.aggregateTelemetry [--workers N] [--convert] [--out PATH] paths...
+
+Each path is a sidecar or a directory that is searched for sidecars. With
+    --convert, the text logs (*Log.txt) found are first turned into sidecars,
+    so logs written before telemetry existed can be aggregated too.
+
+The sidecars are read on a pool of processes. For each one, a file of curves
+    is written next to it (d1Log.npy gives d1Log.curves.tsv) with the mean and
+    standard deviation over the runs of every log column at every eval count
+    seen. A run that stopped early keeps its last row for the larger eval
+    counts, and a run counts only from its first row. Sidecars with no rows,
+    such as those of a job stopped before its first row or of a text log
+    with only its header, are skipped.
+
+Every pair of sidecars in the same directory with the same columns is then
+    compared on the last row of each run with Welch's t-test. The comparisons
+    are written to the file at --out.
+"""
+DEFAULT_OUT = "telemetryComparisons.tsv"
+CURVES_EXTENSION = ".curves.tsv"
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregates telemetry sidecars.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--convert", action="store_true")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if args.convert:
+            logPaths = findFiles(args.paths, "Log.txt")
+            list(pool.map(convertLog, logPaths, chunksize=8))
+            print(f"Converted {len(logPaths)} text logs")
+
+        sidecarPaths = findFiles(args.paths, TELEMETRY_EXTENSION)
+        summaries = list(pool.map(summarizeSidecar, sidecarPaths, chunksize=8))
+    summaries = [summary for summary in summaries if summary is not None]
+    print(f"Wrote curves for {len(summaries)} sidecars, skipped "
+          f"{len(sidecarPaths) - len(summaries)} empty ones")
+
+    numOfComparisons = writeComparisons(summaries, args.out)
+    print(f"Wrote {numOfComparisons} comparisons to {args.out}")
+
+# Returns the sorted paths that end with ending, found in the given files and
+#   under the given directories.
+def findFiles(paths, ending):
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found += [os.path.join(root, name) for name in names if name.endswith(ending)]
+        elif path.endswith(ending):
+            found.append(path)
+    return sorted(set(found))
+
+def convertLog(logPath):
+    np.save(getTelemetryPath(logPath), readTextLog(logPath))
+
+# Writes the curves of the sidecar at path and returns (path, columnNames,
+#   finals), where finals is a (runs x columns) array of the last row of each
+#   run. Returns None if the sidecar has no rows.
+def summarizeSidecar(path):
+    table = np.load(path, mmap_mode='r')
+    if len(table) == 0:
+        return None
+    runNumbers = table[:, 0]
+    columnNames = getColumnNames(table.shape[1] - 1)
+
+    # Rows are in run order, so each run is one slice of the table.
+    runStarts = np.flatnonzero(np.r_[True, runNumbers[1:] != runNumbers[:-1]])
+    runEnds = np.r_[runStarts[1:], len(table)]
+    finals = np.array(table[runEnds - 1, 2:])
+
+    evalGrid = np.unique(table[:, 1])
+    curves = np.full((len(runStarts), len(evalGrid), table.shape[1] - 2), np.nan)
+    for i in range(len(runStarts)):
+        run = table[runStarts[i]:runEnds[i]]
+        rowOfEval = np.searchsorted(run[:, 1], evalGrid, side='right') - 1
+        started = rowOfEval >= 0
+        curves[i, started] = run[rowOfEval[started], 2:]
+
+    means, stdevs = getMeanAndStdev(curves)
+    with open(os.path.splitext(path)[0] + CURVES_EXTENSION, 'w') as curvesFile:
+        header = [columnNames[0], "runs"]
+        for name in columnNames[1:]:
+            header += [name + "Mean", name + "Stdev"]
+        curvesFile.write("\t".join(header) + "\n")
+
+        runCounts = np.sum(~np.isnan(curves[:, :, 0]), axis=0)
+        for j in range(len(evalGrid)):
+            row = [repr(float(evalGrid[j])), str(runCounts[j])]
+            for k in range(len(columnNames) - 1):
+                row += [repr(float(means[j, k])), repr(float(stdevs[j, k]))]
+            curvesFile.write("\t".join(row) + "\n")
+
+    return path, columnNames, finals
+
+# Returns the mean and sample standard deviation over axis 0, skipping nans.
+#   The standard deviation of a single value is 0.
+def getMeanAndStdev(values):
+    counts = np.sum(~np.isnan(values), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.nansum(values, axis=0) / counts
+        squares = np.nansum((values - means) ** 2, axis=0)
+        stdevs = np.where(counts > 1, np.sqrt(squares / np.maximum(counts - 1, 1)), 0.0)
+    return means, stdevs
+
+def writeComparisons(summaries, outPath):
+    numOfComparisons = 0
+    with open(outPath, 'w') as outFile:
+        outFile.write("first\tsecond\tcolumn\tfirstMean\tsecondMean\tt\tdf\tp\n")
+        for i in range(len(summaries)):
+            firstPath, columnNames, firstFinals = summaries[i]
+            for secondPath, secondNames, secondFinals in summaries[i + 1:]:
+                if os.path.dirname(firstPath) != os.path.dirname(secondPath) or \
+                        columnNames != secondNames:
+                    continue
+                for k in range(len(columnNames) - 1):
+                    first = firstFinals[:, k]
+                    second = secondFinals[:, k]
+                    t, df, p = welchTest(first, second)
+                    outFile.write(f"{firstPath}\t{secondPath}\t{columnNames[k + 1]}\t"
+                                  f"{np.mean(first)}\t{np.mean(second)}\t{t}\t{df}\t{p}\n")
+                    numOfComparisons += 1
+    return numOfComparisons
+
+# Returns the t statistic, degrees of freedom and two sided p value of Welch's
+#   t-test on two samples. Samples with no variance at all give nan.
+def welchTest(first, second):
+    if len(first) < 2 or len(second) < 2:
+        return math.nan, math.nan, math.nan
+    firstVar = np.var(first, ddof=1) / len(first)
+    secondVar = np.var(second, ddof=1) / len(second)
+    if firstVar + secondVar == 0:
+        return math.nan, math.nan, math.nan
+
+    t = (np.mean(first) - np.mean(second)) / math.sqrt(firstVar + secondVar)
+    df = (firstVar + secondVar) ** 2 / \
+         (firstVar ** 2 / (len(first) - 1) + secondVar ** 2 / (len(second) - 1))
+    return float(t), float(df), regularizedBeta(df / (df + t * t), df / 2, 0.5)
+
+# The regularized incomplete beta function I_x(a, b), which gives the two sided
+#   p value of a t statistic. Uses the continued fraction from Numerical Recipes.
+def regularizedBeta(x, a, b):
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) +
+                     a * math.log(x) + b * math.log(1 - x))
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - front * betaFraction(1 - x, b, a) / b
+    return front * betaFraction(x, a, b) / a
+
+def betaFraction(x, a, b, maxIterations=300, epsilon=1e-15):
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, maxIterations + 1):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1.0) < epsilon:
+            break
+    return fraction
+
+if __name__ == '__main__':
+    main()
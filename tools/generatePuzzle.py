@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+import argparse
+import time
+from src.puzzleGenerator import generatePuzzle, writeLup, writePlantedSolution, \
+    DEFAULT_BLACK_DENSITY, DEFAULT_NUMBERED_RATIO
+
+"""
+Writes a random Light Up puzzle in the .lup format. Run it from the top of
+    the repository with:
+
+    python3 -m tools.generatePuzzle x y out.lup [--blackDensity D]
+        [--numberedRatio R] [--seed S] [--unplanted] [--solution sol.txt]
+
+x and y are the sizes of the board as in the first two lines of a .lup file.
+    By default a solution is planted first so the puzzle is solvable, and
+    --solution writes that solution out. See src/puzzleGenerator.py.
+"""
+def main():
+    parser = argparse.ArgumentParser(description="Writes a random Light Up puzzle.")
+    parser.add_argument("x", type=int)
+    parser.add_argument("y", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--blackDensity", type=float, default=DEFAULT_BLACK_DENSITY)
+    parser.add_argument("--numberedRatio", type=float, default=DEFAULT_NUMBERED_RATIO)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--unplanted", action="store_true",
+                        help="draw the numbers at random, so there may be no solution")
+    parser.add_argument("--solution", help="write the planted solution here")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    boardArray, bulbs = generatePuzzle(args.x, args.y, args.blackDensity, args.numberedRatio,
+                                       args.seed, planted=not args.unplanted)
+    writeLup(args.out, boardArray)
+    if args.solution is not None:
+        if bulbs is None:
+            print('There is no planted solution to write with --unplanted!')
+        else:
+            writePlantedSolution(args.solution, boardArray, bulbs)
+    print(f"Wrote {args.out} in {time.perf_counter() - start:.2f} seconds")
+
+if __name__ == '__main__':
+    main()